@@ -16,11 +16,15 @@ from email.mime.multipart import MIMEMultipart
 # ---------------------------
 load_dotenv()
 
+# Imported after load_dotenv: budget_api reads BUDGET_MODEL_DIR/BUDGET_CHART_DIR at import
+from budget_api import budget_api
+
 # ---------------------------
 # Create Flask app
 # ---------------------------
 app = Flask(__name__)
 CORS(app)
+app.register_blueprint(budget_api)
 
 # ---------------------------
 # MongoDB setup
@@ -0,0 +1,168 @@
+# bench_budget.py
+"""
+Benchmarks for TravelBudgetPredictor.
+
+    python bench_budget.py              # run every benchmark
+    python bench_budget.py ingestion    # run one by name
+"""
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from budget import TravelBudgetPredictor, iter_trip_chunks, simulate_user_data
+from synthetic_data import generate_trips, write_trip_shards
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_ingestion(num_users=50000):
+    """prepare_data on list-of-dicts vs the columnar DataFrame / Arrow paths"""
+    np.random.seed(0)
+    users = simulate_user_data(num_users)
+    # A tenth of the trips use the old single-number miscellaneous format
+    for user in users[::10]:
+        user['miscellaneous'] = user['misc_total']
+
+    predictor = TravelBudgetPredictor()
+    inputs = {
+        "dicts": users,
+        "frame (nested misc)": pd.DataFrame(users),
+        "frame (flat misc)": pd.json_normalize(users),
+    }
+    try:
+        import pyarrow as pa
+        # Arrow needs one misc type per column, so give it the breakdown format
+        inputs["arrow"] = pa.Table.from_pandas(pd.json_normalize(
+            [u for u in users if isinstance(u['miscellaneous'], dict)]))
+    except ImportError:
+        pass
+
+    baseline, expected = timed(lambda: predictor.prepare_data(users))
+    print(f"{'input':>20} {'rows':>8} {'time (ms)':>10} {'speedup':>8} {'matches':>8}")
+    for name, data in inputs.items():
+        elapsed, X = timed(lambda: predictor.prepare_data(data))
+        if name == "arrow":
+            reference = expected[[isinstance(u['miscellaneous'], dict) for u in users]]
+        else:
+            reference = expected
+        matches = np.allclose(X, reference, rtol=1e-6)
+        print(f"{name:>20} {len(X):>8} {elapsed * 1000:>10.1f} {baseline / elapsed:>8.1f} {str(matches):>8}")
+
+
+def bench_metrics(sizes=(5000, 10000, 20000), sample_size=5000):
+    """evaluate() with a sampled silhouette vs the exact full-matrix silhouette"""
+    from sklearn.metrics import silhouette_score
+
+    print(f"{'trips':>8} {'fit (ms)':>9} {'evaluate (ms)':>14} {'sampled':>8} "
+          f"{'full (ms)':>10} {'full':>8} {'davies-bouldin':>15}")
+    for num_users in sizes:
+        np.random.seed(0)
+        users = simulate_user_data(num_users)
+        predictor = TravelBudgetPredictor()
+        fit_time, _ = timed(lambda: predictor.fit(users), repeat=1)
+        evaluate_time, metrics = timed(lambda: predictor.evaluate(users, sample_size=sample_size), repeat=1)
+
+        X_scaled = predictor._scale(predictor.prepare_data(users))
+        labels = predictor.kmeans.predict(X_scaled)
+        full_time, full = timed(lambda: silhouette_score(X_scaled, labels), repeat=1)
+        print(f"{num_users:>8} {fit_time * 1000:>9.0f} {evaluate_time * 1000:>14.0f} "
+              f"{metrics['silhouette']:>8.3f} {full_time * 1000:>10.0f} {full:>8.3f} "
+              f"{metrics['davies_bouldin']:>15.3f}")
+
+
+def bench_recommend(num_users=20000, num_single=1000):
+    """recommend_budgets on the whole set vs one recommend_budget call per traveler"""
+    np.random.seed(0)
+    users = simulate_user_data(num_users)
+    predictor = TravelBudgetPredictor().fit(users)
+
+    single, _ = timed(lambda: [predictor.recommend_budget(None, u) for u in users[:num_single]], repeat=1)
+    single_per_user = single / num_single
+    print(f"{'method':>10} {'trips':>8} {'time (ms)':>10} {'trips/s':>10}")
+    print(f"{'single':>10} {num_single:>8} {single * 1000:>10.1f} {1 / single_per_user:>10.0f}")
+    for name, data in [("dicts", users), ("frame", pd.DataFrame(users))]:
+        elapsed, _ = timed(lambda: predictor.recommend_budgets(data))
+        print(f"{name:>10} {num_users:>8} {elapsed * 1000:>10.1f} {num_users / elapsed:>10.0f}")
+
+
+def bench_scale(num_trips=1000000, shard_size=100000, seed=0):
+    """
+    Production-sized load: synthetic trip shards, a streaming fit over them
+    and batch recommendations, all from the same seed
+    """
+    np.random.seed(seed)
+    simulate_time, _ = timed(lambda: simulate_user_data(10000), repeat=1)
+    generate_time, _ = timed(lambda: generate_trips(10000, seed), repeat=1)
+    print(f"10k trips: simulate_user_data {simulate_time * 1000:.0f} ms, "
+          f"generate_trips {generate_time * 1000:.0f} ms ({simulate_time / generate_time:.0f}x)")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        for fmt in ["parquet", "npy"]:
+            write_time, paths = timed(
+                lambda: write_trip_shards(f"{data_dir}/{fmt}", num_trips, shard_size, seed, fmt), repeat=1)
+            predictor = TravelBudgetPredictor()
+            fit_time, _ = timed(lambda: predictor.fit_streaming(lambda: iter_trip_chunks(paths, shard_size)), repeat=1)
+            print(f"{fmt:>8}: wrote {num_trips} trips in {len(paths)} shards in {write_time:.1f} s, "
+                  f"streaming fit {fit_time:.1f} s")
+
+        trips = generate_trips(num_trips, seed + 1)
+        recommend_time, _ = timed(lambda: predictor.recommend_budgets(trips), repeat=1)
+        print(f"recommend_budgets: {num_trips} trips in {recommend_time:.1f} s "
+              f"({num_trips / recommend_time:.0f} trips/s)")
+
+
+def bench_similar(sizes=(10000, 100000, 500000), k=20, num_queries=200):
+    """
+    SimilarTravelerIndex query latency vs dataset size, against a brute-force
+    scan, plus the cost of incremental inserts
+    """
+    print(f"{'trips':>8} {'fit (s)':>10} {'index (ms)':>11} {'brute (ms)':>11} {'speedup':>8} "
+          f"{'insert 1k (ms)':>15} {'after insert (ms)':>18}")
+    for num_trips in sizes:
+        predictor = TravelBudgetPredictor()
+        fit_time, _ = timed(lambda: predictor.fit(generate_trips(num_trips, seed=0)), repeat=1)
+        index = predictor.neighbor_index
+        queries = predictor._scale(predictor.prepare_data(generate_trips(num_queries, seed=1)))
+        points = np.asarray(index.tree.data)
+
+        def brute_force():
+            for query in queries[:20]:
+                distances = ((points - query) ** 2).sum(axis=1)
+                np.argpartition(distances, k)[:k]
+
+        index_time, _ = timed(lambda: [index.query(query[None], k) for query in queries])
+        brute_time, _ = timed(brute_force, repeat=1)
+        index_ms = index_time / num_queries * 1000
+        brute_ms = brute_time / 20 * 1000
+
+        extra = generate_trips(1000, seed=2)
+        insert_time, _ = timed(lambda: predictor.add_trips(extra), repeat=1)
+        after_time, _ = timed(lambda: [index.query(query[None], k) for query in queries])
+        print(f"{num_trips:>8} {fit_time:>10.2f} {index_ms:>11.3f} {brute_ms:>11.3f} "
+              f"{brute_ms / index_ms:>8.1f} {insert_time * 1000:>15.1f} "
+              f"{after_time / num_queries * 1000:>18.3f}")
+
+
+BENCHMARKS = {
+    "ingestion": bench_ingestion,
+    "metrics": bench_metrics,
+    "recommend": bench_recommend,
+    "scale": bench_scale,
+    "similar": bench_similar,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"\n=== {name} ===")
+        BENCHMARKS[name]()
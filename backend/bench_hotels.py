@@ -0,0 +1,150 @@
+# bench_hotels.py
+"""
+Benchmarks for the hotel recommendation paths, on synthetic hotel tables.
+
+    python bench_hotels.py            # run every benchmark
+    python bench_hotels.py budget     # run one by name
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from hotel_index import BudgetIntervalIndex, HotelSpatialIndex
+from hotel_store import HotelStore, amenity_mask, build_store
+from routing import haversine_distances
+from synthetic_data import CITY_CENTERS, generate_hotels
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_budget(sizes=(10000, 100000, 1000000), num_queries=100):
+    """BudgetIntervalIndex vs the DataFrame mask-and-copy filter, for single budgets and ranges"""
+    rng = np.random.default_rng(1)
+    budgets = rng.integers(300, 40000, size=num_queries)
+    ranges = [(b, b + w) for b, w in zip(budgets, rng.integers(0, 3000, size=num_queries))]
+
+    print(f"{'hotels':>8} {'build (ms)':>11} {'query':>6} {'mask (us)':>10} {'index (us)':>11} "
+          f"{'+take (us)':>11} {'speedup':>8} {'matches':>8}")
+    for num_hotels in sizes:
+        df = generate_hotels(num_hotels, seed=0)
+        low, high = df["budget_min_INR"], df["budget_max_INR"]
+        build_time, index = timed(lambda: BudgetIntervalIndex(low, high), repeat=1)
+
+        for name, queries in [("stab", [(b, b) for b in budgets]), ("range", ranges)]:
+            # Results are dropped as they are produced; large tables match many rows
+            mask_time, _ = timed(lambda: [len(df[(low <= b) & (high >= a)].copy()) for a, b in queries])
+            index_time, _ = timed(lambda: [len(index.overlap(a, b)) for a, b in queries])
+            take_time, _ = timed(lambda: [len(df.take(index.overlap(a, b))) for a, b in queries])
+            matches = all(np.array_equal(np.flatnonzero((low <= b) & (high >= a)), index.overlap(a, b))
+                          for a, b in queries[:20])
+            print(f"{num_hotels:>8} {build_time * 1000:>11.1f} {name:>6} "
+                  f"{mask_time / num_queries * 1e6:>10.1f} {index_time / num_queries * 1e6:>11.1f} "
+                  f"{take_time / num_queries * 1e6:>11.1f} {mask_time / take_time:>8.1f} {str(matches):>8}")
+
+
+def bench_store(sizes=(30000, 300000, 1500000)):
+    """Opening the memory-mapped hotel store vs parsing the city CSVs, and offset vs string city filters"""
+    print(f"{'hotels':>8} {'read csv (ms)':>14} {'open store (ms)':>16} "
+          f"{'city ==  (us)':>14} {'offsets (us)':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_hotels in sizes:
+            per_city = num_hotels // len(CITY_CENTERS)
+            frames = {city: generate_hotels(per_city, city, seed=0) for city in CITY_CENTERS}
+            csv_paths = []
+            for city, frame in frames.items():
+                csv_paths.append(os.path.join(tmp, f"{city}_hotels_full.csv"))
+                frame.to_csv(csv_paths[-1], index=False)
+            store_path = os.path.join(tmp, "hotels.arrow")
+            build_store(frames, store_path)
+
+            csv_time, tables = timed(lambda: [pd.read_csv(path) for path in csv_paths], repeat=1)
+            combined = pd.concat([frame.assign(city=city) for city, frame in zip(CITY_CENTERS, tables)],
+                                 ignore_index=True)
+            open_time, store = timed(lambda: HotelStore(store_path))
+
+            budget = combined["budget_min_INR"].to_numpy()
+            mask_time, _ = timed(lambda: [budget[(combined["city"] == city).to_numpy()].sum()
+                                          for city in CITY_CENTERS])
+            slice_time, _ = timed(lambda: [store.column("budget_min_INR")[store.city_slice(city)].sum()
+                                           for city in CITY_CENTERS])
+            print(f"{num_hotels:>8} {csv_time * 1000:>14.1f} {open_time * 1000:>16.2f} "
+                  f"{mask_time / len(CITY_CENTERS) * 1e6:>14.1f} {slice_time / len(CITY_CENTERS) * 1e6:>13.1f}")
+
+
+def bench_amenities(sizes=(10000, 100000, 1000000)):
+    """Amenity bitmask search vs Yes/No string column filters, for wifi+pool+breakfast under 3000"""
+    wanted = ["wifi", "pool", "breakfast_included"]
+    required = amenity_mask(wanted)
+    preferred = amenity_mask(["spa", "gym", "bar"])
+    print(f"{'hotels':>8} {'strings (ms)':>13} {'bitmask (ms)':>13} {'+preferred (ms)':>16} "
+          f"{'mask only (us)':>15} {'matches':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_hotels in sizes:
+            df = generate_hotels(num_hotels, seed=0)
+            store_path = os.path.join(tmp, "hotels.arrow")
+            build_store({"udaipur": df}, store_path)
+            store = HotelStore(store_path)
+            store.budget_index("udaipur")
+
+            def strings():
+                keep = df["budget_min_INR"] <= 3000
+                for name in wanted:
+                    keep &= df[name] == "Yes"
+                return np.flatnonzero(keep.to_numpy())
+
+            masks = store.column("amenity_mask")
+            string_time, expected = timed(strings)
+            search_time, (found, _) = timed(lambda: store.search("udaipur", 0, 3000, required))
+            ranked_time, _ = timed(lambda: store.search("udaipur", 0, 3000, required, preferred))
+            mask_time, _ = timed(lambda: np.flatnonzero((masks & required) == required))
+            print(f"{num_hotels:>8} {string_time * 1000:>13.2f} {search_time * 1000:>13.2f} "
+                  f"{ranked_time * 1000:>16.2f} {mask_time * 1e6:>15.1f} "
+                  f"{str(np.array_equal(expected, found)):>8}")
+
+
+def bench_spatial(sizes=(10000, 100000, 1000000), num_queries=100, k=10, radius_km=1.0):
+    """HotelSpatialIndex k-nearest and radius queries vs a haversine scan over every hotel"""
+    rng = np.random.default_rng(2)
+    print(f"{'hotels':>8} {'build (ms)':>11} {'scan (us)':>10} {'knn (us)':>9} {'radius (us)':>12} "
+          f"{'speedup':>8} {'matches':>8}")
+    for num_hotels in sizes:
+        df = generate_hotels(num_hotels, seed=0)
+        lat, lon = df["latitude"].to_numpy(), df["longitude"].to_numpy()
+        points = np.column_stack([rng.uniform(lat.min(), lat.max(), num_queries),
+                                  rng.uniform(lon.min(), lon.max(), num_queries)])
+        build_time, index = timed(lambda: HotelSpatialIndex(lat, lon), repeat=1)
+
+        scan_time, _ = timed(lambda: [np.argpartition(haversine_distances([a], [b], lat, lon)[0], k)[:k]
+                                      for a, b in points])
+        knn_time, _ = timed(lambda: [index.nearest(a, b, k) for a, b in points])
+        radius_time, _ = timed(lambda: [index.within(a, b, radius_km) for a, b in points])
+        matches = all(np.allclose(np.sort(haversine_distances([a], [b], lat, lon)[0])[:k], index.nearest(a, b, k)[1])
+                      for a, b in points[:20])
+        print(f"{num_hotels:>8} {build_time * 1000:>11.1f} {scan_time / num_queries * 1e6:>10.1f} "
+              f"{knn_time / num_queries * 1e6:>9.1f} {radius_time / num_queries * 1e6:>12.1f} "
+              f"{scan_time / knn_time:>8.1f} {str(matches):>8}")
+
+
+BENCHMARKS = {
+    "budget": bench_budget,
+    "store": bench_store,
+    "amenities": bench_amenities,
+    "spatial": bench_spatial,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"\n=== {name} ===")
+        BENCHMARKS[name]()
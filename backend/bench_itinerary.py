@@ -0,0 +1,157 @@
+# bench_itinerary.py
+"""
+Benchmarks for ItineraryGenerator.
+
+Runs against an in-memory mongomock client, so no MongoDB server is needed:
+    pip install mongomock
+    python bench_itinerary.py            # run every benchmark
+    python bench_itinerary.py scaling    # run one by name
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import mongomock
+
+from routing import DayRouteOptimizer, haversine_matrix, travel_minutes_matrix
+from synthetic_data import attraction_documents, generate_attractions
+from toristspots import DAY_START, ItineraryGenerator
+
+WEATHER = ["sunny", "cloudy", "windy", "rainy", "sunny", "snowy", "sunny"]
+
+
+def make_attractions(n, seed=0, city="jaipur", spread=0.1):
+    """Synthetic attraction documents shaped like the city collections"""
+    return attraction_documents(generate_attractions(n, city, seed, spread=spread))
+
+
+def make_generator(num_attractions, city="jaipur", seed=0, **kwargs):
+    """ItineraryGenerator over a mongomock city collection, with the model trained"""
+    generator = ItineraryGenerator(client=mongomock.MongoClient(), **kwargs)
+    if num_attractions:
+        generator.city_collections[city].insert_many(make_attractions(num_attractions, seed, city))
+    generator.train_decision_tree(None)
+    generator.get_attractions(city)  # warm the catalog
+    return generator
+
+
+def trip(num_days, arrival=date(2023, 10, 1)):
+    return {
+        "arrival_date": arrival.isoformat(),
+        "departure_date": (arrival + timedelta(days=num_days - 1)).isoformat(),
+        "weather_forecast": [{"condition": WEATHER[d % len(WEATHER)]} for d in range(num_days)],
+    }
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_scaling():
+    """generate_itinerary time vs catalog size and trip length; us/(n*day) should stay flat"""
+    print(f"{'attractions':>11} {'days':>5} {'time (ms)':>10} {'us per n*day':>13}")
+    for n in [1000, 2500, 5000, 10000]:
+        generator = make_generator(n)
+        for days in [1, 7, 15, 30]:
+            elapsed = timed(lambda: generator.generate_itinerary(city="jaipur", **trip(days)))
+            print(f"{n:>11} {days:>5} {elapsed * 1000:>10.1f} {elapsed * 1e6 / (n * days):>13.3f}")
+
+
+def day_optimizer(records):
+    """DayRouteOptimizer over records, used to score routes the same way optimize_itinerary does"""
+    distances = haversine_matrix([r.latitude for r in records], [r.longitude for r in records])
+    return DayRouteOptimizer(
+        distances, travel_minutes_matrix(distances),
+        [r.open_time for r in records], [r.close_time for r in records],
+        [r.duration for r in records], start_time=DAY_START
+    )
+
+
+def bench_routing(trials=20, time_budget=0.05):
+    """
+    optimize_itinerary vs the old (lat, lon) sort: km travelled, minutes past
+    closing under the travel-time model, and optimizer runtime per day size
+    """
+    generator = make_generator(500)
+    records = generator.catalogs["jaipur"].find_records()
+    rng = random.Random(1)
+    print(f"{'stops':>5} {'sorted km':>10} {'late min':>9} {'optimized km':>13} {'late min':>9} "
+          f"{'km saved':>9} {'mean ms':>8} {'max ms':>7}")
+    for size in [4, 8, 12, 20, 30]:
+        totals = [0.0, 0.0, 0.0, 0.0]
+        runtimes = []
+        for _ in range(trials):
+            sample = rng.sample(records, size)
+            scorer = day_optimizer(sample)
+            positions = {record.id_str: i for i, record in enumerate(sample)}
+            stops = [{
+                "attraction_id": record.id_str,
+                "duration": record.duration,
+                "location": {"latitude": record.latitude, "longitude": record.longitude},
+            } for record in sample]
+
+            sorted_order = sorted(range(size), key=lambda i: (sample[i].latitude, sample[i].longitude))
+            late, km, _ = scorer.cost(sorted_order)
+            totals[0] += km
+            totals[1] += late
+
+            itinerary = {"city": "jaipur", "days": [{"attractions": stops}]}
+            start = time.perf_counter()
+            generator.optimize_itinerary(itinerary, time_budget=time_budget)
+            runtimes.append(time.perf_counter() - start)
+
+            order = [positions[stop["attraction_id"]] for stop in itinerary["days"][0]["attractions"]]
+            late, km, _ = scorer.cost(order)
+            totals[2] += km
+            totals[3] += late
+        sorted_km, sorted_late, optimized_km, optimized_late = (t / trials for t in totals)
+        print(f"{size:>5} {sorted_km:>10.2f} {sorted_late:>9.0f} {optimized_km:>13.2f} {optimized_late:>9.0f} "
+              f"{1 - optimized_km / sorted_km:>9.1%} {sum(runtimes) / trials * 1000:>8.1f} "
+              f"{max(runtimes) * 1000:>7.1f}")
+
+
+def bench_batch(num_requests=200, num_attractions=2000):
+    """generate_itineraries throughput vs worker processes; ideal speedup is linear"""
+    generator = make_generator(num_attractions)
+    rng = random.Random(2)
+    requests = [
+        dict(city="jaipur", num_persons=rng.randint(1, 6), **trip(rng.randint(2, 10)))
+        for _ in range(num_requests)
+    ]
+
+    start = time.perf_counter()
+    for request in requests:
+        generator.generate_itinerary(**request)
+    sequential = time.perf_counter() - start
+    print(f"{'processes':>9} {'itineraries/s':>14} {'speedup':>8}")
+    print(f"{'inline':>9} {num_requests / sequential:>14.1f} {1.0:>8.2f}")
+
+    max_processes = os.cpu_count() or 1
+    for processes in sorted({1, 2, 4, 8, max_processes}):
+        if processes > max_processes:
+            continue
+        start = time.perf_counter()
+        for _ in generator.generate_itineraries(requests, processes=processes):
+            pass
+        elapsed = time.perf_counter() - start
+        print(f"{processes:>9} {num_requests / elapsed:>14.1f} {sequential / elapsed:>8.2f}")
+
+
+BENCHMARKS = {
+    "scaling": bench_scaling,
+    "routing": bench_routing,
+    "batch": bench_batch,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"\n=== {name} ===")
+        BENCHMARKS[name]()
@@ -0,0 +1,68 @@
+# bench_startup.py
+"""
+Import time and memory of the backend modules, as a fresh worker sees them.
+
+Every module is imported in its own interpreter:
+    python bench_startup.py                 # every module
+    python bench_startup.py budget hotel    # just these
+    python bench_startup.py --check         # exit 1 if importing app loads plotting libraries (for CI)
+"""
+import json
+import subprocess
+import sys
+
+MODULES = ["app", "budget_api", "budget", "toristspots", "routing", "hotel", "hotel_backend"]
+
+# Libraries only some code paths need; none of these should load at import time
+HEAVY_MODULES = ["matplotlib", "seaborn", "sklearn", "pandas", "pyarrow", "folium", "joblib"]
+
+# Plotting libraries that must never be pulled in by importing the Flask app
+FORBIDDEN_IN_APP = ["matplotlib", "seaborn"]
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+if {module!r}:
+    __import__({module!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def probe(module):
+    """Import module in a fresh interpreter; '' measures the bare interpreter"""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def check_app_imports():
+    loaded = [name for name in probe("app")["loaded"] if name in FORBIDDEN_IN_APP]
+    if loaded:
+        print(f"FAIL: importing app loads {', '.join(loaded)}")
+        return 1
+    print("OK: importing app loads no plotting libraries")
+    return 0
+
+
+def bench_imports(modules):
+    baseline = probe("")
+    print(f"{'module':>14} {'import (ms)':>12} {'RSS (MB)':>9} {'+RSS (MB)':>10}  heavy modules loaded")
+    for module in modules:
+        result = probe(module)
+        rss = result["max_rss_kb"] / 1024
+        extra = (result["max_rss_kb"] - baseline["max_rss_kb"]) / 1024
+        loaded = ", ".join(result["loaded"]) or "-"
+        print(f"{module:>14} {result['seconds'] * 1000:>12.1f} {rss:>9.1f} {extra:>10.1f}  {loaded}")
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv[1:]:
+        sys.exit(check_app_imports())
+    bench_imports(sys.argv[1:] or MODULES)
@@ -1,26 +1,351 @@
 import numpy as np
-import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score
-import matplotlib.pyplot as plt
-import seaborn as sns
 import json
-import joblib
+import itertools
+import os
+import threading
 import warnings
 warnings.filterwarnings('ignore')
 
+from lazy_imports import lazy_import
+from model_store import ModelArtifactStore
+
+# Heavy dependencies, imported the first time a code path uses them
+pd = lazy_import('pandas')
+plt = lazy_import('matplotlib.pyplot')
+joblib = lazy_import('joblib')
+KMeans = lazy_import('sklearn.cluster', 'KMeans')
+MiniBatchKMeans = lazy_import('sklearn.cluster', 'MiniBatchKMeans')
+StandardScaler = lazy_import('sklearn.preprocessing', 'StandardScaler')
+davies_bouldin_score = lazy_import('sklearn.metrics', 'davies_bouldin_score')
+silhouette_score = lazy_import('sklearn.metrics', 'silhouette_score')
+PCA = lazy_import('sklearn.decomposition', 'PCA')
+IncrementalPCA = lazy_import('sklearn.decomposition', 'IncrementalPCA')
+KDTree = lazy_import('sklearn.neighbors', 'KDTree')
+euclidean_distances = lazy_import('sklearn.metrics.pairwise', 'euclidean_distances')
+
+# prepare_data columns summarised per cluster
+SPEND_COLUMNS = {
+    'avg_initial_budget': 0,
+    'avg_accommodation': 1,
+    'avg_attractions': 2,
+    'avg_food': 3,
+    'avg_transport': 4,
+    'avg_misc': 6
+}
+FOOD_PREFERENCE_COLUMN = 7
+TRANSPORT_TYPE_COLUMN = 8
+
+# Trip fields behind the first nine prepare_data columns, with their defaults
+TRIP_FIELDS = [
+    ('initial_budget', 0),
+    ('accommodation_total', 0),
+    ('attractions_total', 0),
+    ('food_total', 0),
+    ('transport_total', 0),
+    ('days', 1),
+    ('misc_total', 0),
+    ('food_preference', 1),
+    ('transport_type', 1)
+]
+MISC_CATEGORIES = ['shopping', 'clubbing', 'souvenirs', 'emergencies', 'others']
+
+# Roughly this many training trips are kept with the model for cluster charts
+CHART_SAMPLE_SIZE = 5000
+
+def trip_feature_pipeline(match=None):
+    """
+    Aggregation stages that flatten trips into prepare_data's columns
+    
+    Missing fields get prepare_data's defaults and miscellaneous always comes
+    back as a full {category: amount} breakdown; trips in the old format,
+    where it is one number, put it under shopping. Feed the resulting cursor
+    straight into prepare_data or fit.
+    """
+    is_breakdown = {'$eq': [{'$type': '$miscellaneous'}, 'object']}
+    project = {'_id': 0}
+    for field, default in TRIP_FIELDS:
+        project[field] = {'$ifNull': [f'${field}', default]}
+    for category in MISC_CATEGORIES:
+        if category == 'shopping':
+            old_format = {'$ifNull': ['$miscellaneous', 0]}
+        else:
+            old_format = 0
+        project[f'miscellaneous.{category}'] = {
+            '$cond': [is_breakdown, {'$ifNull': [f'$miscellaneous.{category}', 0]}, old_format]
+        }
+    stages = [{'$match': match}] if match else []
+    return stages + [{'$project': project}]
+
+def iter_trip_chunks(source, chunk_size=10000, match=None):
+    """
+    Yield trips in chunks from MongoDB or from files on disk
+    
+    source is either a pymongo collection (optionally filtered by match) or a
+    list of .parquet, .csv or .npy paths. Parquet and CSV chunks come back as
+    DataFrames; .npy files hold already-prepared feature matrices and are
+    sliced from a memory map. Only one chunk is in memory at a time.
+    """
+    if hasattr(source, 'find'):
+        cursor = source.find(match or {}, {'_id': 0}, batch_size=chunk_size)
+        while True:
+            batch = list(itertools.islice(cursor, chunk_size))
+            if not batch:
+                return
+            yield pd.DataFrame.from_records(batch)
+            
+    for path in source:
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+                yield batch.to_pandas()
+        elif path.endswith('.csv'):
+            yield from pd.read_csv(path, chunksize=chunk_size)
+        elif path.endswith('.npy'):
+            X = np.load(path, mmap_mode='r')
+            for start in range(0, len(X), chunk_size):
+                yield np.array(X[start:start + chunk_size], dtype=np.float32)
+        else:
+            raise ValueError(f"Unsupported trip file: {path}")
+
+def draw_cluster_scatter(ax, projection, labels):
+    """PCA scatter of trips coloured by cluster, on a matplotlib Axes"""
+    scatter = ax.scatter(projection[:, 0], projection[:, 1], c=labels, cmap='viridis', alpha=0.7)
+    ax.figure.colorbar(scatter, ax=ax, label='Cluster')
+    ax.set_xlabel('PCA Component 1')
+    ax.set_ylabel('PCA Component 2')
+    ax.set_title('Travel Budget Clusters')
+
+def draw_budget_boxplot(ax, budgets, labels, n_clusters):
+    """Initial budget distribution per cluster, on a matplotlib Axes"""
+    cluster_budgets = [budgets[labels == i] for i in range(n_clusters)]
+    ax.boxplot(cluster_budgets)
+    ax.set_xticks(range(1, n_clusters + 1))
+    ax.set_xticklabels([f'Cluster {i}' for i in range(n_clusters)])
+    ax.set_ylabel('Initial Budget (₹)')
+    ax.set_title('Budget Distribution by Cluster')
+    ax.grid(True, alpha=0.3)
+
+class ClusterAggregates:
+    """
+    Running per-cluster totals kept in small NumPy arrays
+    
+    Holds the trip count, spend sums and food preference / transport type
+    histograms for every cluster, so cluster statistics cost O(1) and new
+    trips are folded in without touching the history.
+    """
+    def __init__(self, n_clusters):
+        self.n_clusters = n_clusters
+        self.counts = np.zeros(n_clusters, dtype=np.int64)
+        self.sums = np.zeros((n_clusters, len(SPEND_COLUMNS)))
+        self.food_preference_counts = np.zeros((n_clusters, 1), dtype=np.int64)
+        self.transport_type_counts = np.zeros((n_clusters, 1), dtype=np.int64)
+        
+    def _add_histogram(self, counts, labels, values):
+        # Widen the histogram if a new category code appears
+        if values.size and values.max() >= counts.shape[1]:
+            wider = np.zeros((self.n_clusters, values.max() + 1), dtype=np.int64)
+            wider[:, :counts.shape[1]] = counts
+            counts = wider
+        np.add.at(counts, (labels, values), 1)
+        return counts
+        
+    def add(self, X, labels):
+        """Fold prepared feature rows and their cluster labels into the totals"""
+        if not self.counts.flags.writeable:
+            # Loaded from a read-only memory map; take a private copy first
+            self.counts = self.counts.copy()
+            self.sums = self.sums.copy()
+            self.food_preference_counts = self.food_preference_counts.copy()
+            self.transport_type_counts = self.transport_type_counts.copy()
+            
+        labels = np.asarray(labels, dtype=np.intp)
+        self.counts += np.bincount(labels, minlength=self.n_clusters)
+        np.add.at(self.sums, labels, X[:, list(SPEND_COLUMNS.values())])
+        self.food_preference_counts = self._add_histogram(
+            self.food_preference_counts, labels, X[:, FOOD_PREFERENCE_COLUMN].astype(np.int64))
+        self.transport_type_counts = self._add_histogram(
+            self.transport_type_counts, labels, X[:, TRANSPORT_TYPE_COLUMN].astype(np.int64))
+        
+    def stats(self, cluster_id):
+        count = self.counts[cluster_id]
+        if count == 0:
+            return None
+            
+        stats = {'cluster_id': cluster_id, 'num_users': int(count)}
+        means = self.sums[cluster_id] / count
+        for name, mean in zip(SPEND_COLUMNS, means):
+            stats[name] = mean
+        # argmax picks the lowest code on ties, like max() over a set of small ints
+        stats['common_food_preference'] = int(np.argmax(self.food_preference_counts[cluster_id]))
+        stats['common_transport_type'] = int(np.argmax(self.transport_type_counts[cluster_id]))
+        return stats
+
+class SimilarTravelerIndex:
+    """
+    k-nearest-neighbour index of trips in the model's scaled feature space
+    
+    Trips live in a KDTree plus a buffer of recent inserts that is searched
+    by brute force. Once the buffer outgrows rebuild_fraction of the tree,
+    add() rebuilds everything into one tree, so inserts stay cheap and
+    queries stay O(log n) plus a scan of the small buffer. Every trip keeps
+    its insertion position, which indexes its prepare_data row in features.
+    
+    Queries read (tree, buffer, features) as one snapshot and never wait for
+    add(), which appends past the end of every published snapshot and swaps
+    the new one in as a single tuple.
+    """
+    def __init__(self, rebuild_fraction=0.1, min_rebuild=1024, leaf_size=40):
+        self.rebuild_fraction = rebuild_fraction
+        self.min_rebuild = min_rebuild
+        self.leaf_size = leaf_size
+        self._lock = threading.Lock()
+        self._reset(None, np.empty((0, 0)), np.empty((0, 0), dtype=np.float32))
+        
+    def _reset(self, tree, buffer, features):
+        # Capacity-doubling stores; snapshots are views of their used prefix
+        self._buffer_store, self._features_store = buffer, features
+        self._state = (tree, buffer, features)
+        
+    @property
+    def tree(self):
+        return self._state[0]
+        
+    @property
+    def tree_size(self):
+        tree = self._state[0]
+        return 0 if tree is None else tree.data.shape[0]
+        
+    @property
+    def buffer(self):
+        return self._state[1]
+        
+    @property
+    def features(self):
+        return self._state[2]
+        
+    def __len__(self):
+        return len(self._state[2])
+        
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        tree, buffer, features = state.pop('_state')
+        state['_buffer_store'], state['_features_store'] = buffer, features
+        state['tree'] = tree
+        return state
+        
+    def __setstate__(self, state):
+        if '_pending' in state:
+            # Saved before inserts were merged in add(): buffer, features and
+            # pending inserts are plain attributes
+            for scaled, rows in state.pop('_pending'):
+                state['buffer'] = np.vstack([state['buffer'], scaled])
+                state['features'] = np.vstack([state['features'], rows])
+            state.pop('tree_size', None)
+            state['_buffer_store'] = state.pop('buffer')
+            state['_features_store'] = state.pop('features')
+        tree = state.pop('tree')
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._state = (tree, self._buffer_store, self._features_store)
+        
+    def build(self, X_scaled, X):
+        """Index exactly these trips, replacing anything indexed before"""
+        X_scaled = np.asarray(X_scaled, dtype=np.float64)
+        tree = KDTree(X_scaled, leaf_size=self.leaf_size)
+        with self._lock:
+            self._reset(tree, np.empty((0, X_scaled.shape[1])), np.array(X, dtype=np.float32))
+        return self
+        
+    @staticmethod
+    def _append(store, used, rows):
+        """(store, view of the used rows) after writing rows past the used ones"""
+        if used + len(rows) > len(store):
+            grown = np.empty((max(2 * len(store), used + len(rows)), rows.shape[1]), dtype=store.dtype)
+            grown[:used] = store[:used]
+            store = grown
+        store[used:used + len(rows)] = rows
+        return store, store[:used + len(rows)]
+        
+    def add(self, X_scaled, X):
+        """
+        Insert trips; they can be found by the next query
+        
+        Rebuilds the tree here, not in a query, once the buffer is too big.
+        """
+        X_scaled = np.asarray(X_scaled, dtype=np.float64)
+        X = np.asarray(X, dtype=np.float32)
+        with self._lock:
+            tree, buffer, features = self._state
+            if tree is None:
+                raise ValueError("Index is empty. Call build() first.")
+            self._buffer_store, buffer = self._append(self._buffer_store, len(buffer), X_scaled)
+            self._features_store, features = self._append(self._features_store, len(features), X)
+            
+            if len(buffer) > max(self.min_rebuild, self.rebuild_fraction * tree.data.shape[0]):
+                points = np.vstack([np.asarray(tree.data), buffer])
+                tree = KDTree(points, leaf_size=self.leaf_size)
+                self._buffer_store = buffer = np.empty((0, points.shape[1]))
+            self._state = (tree, buffer, features)
+            
+    def query(self, X_scaled, k):
+        """(distances, positions) of the k nearest trips to each row, nearest first"""
+        distances, positions, _ = self.query_rows(X_scaled, k)
+        return distances, positions
+        
+    def query_rows(self, X_scaled, k):
+        """query() plus the neighbours' prepare_data rows, all from one snapshot"""
+        tree, buffer, features = self._state
+        X_scaled = np.asarray(X_scaled, dtype=np.float64)
+        tree_size = tree.data.shape[0]
+        k = min(k, len(features))
+        distances, positions = tree.query(X_scaled, k=min(k, tree_size))
+        if not len(buffer):
+            return distances, positions, features[positions]
+            
+        # Merge the tree's answers with a brute-force pass over the buffer
+        buffer_positions = tree_size + np.arange(len(buffer))
+        out_distances = np.empty((len(X_scaled), k))
+        out_positions = np.empty((len(X_scaled), k), dtype=np.intp)
+        for start in range(0, len(X_scaled), 1024):
+            block = slice(start, start + 1024)
+            candidate_distances = np.hstack([distances[block], euclidean_distances(X_scaled[block], buffer)])
+            candidate_positions = np.hstack([
+                positions[block], np.broadcast_to(buffer_positions, (len(candidate_distances), len(buffer_positions)))
+            ])
+            nearest = np.argsort(candidate_distances, axis=1, kind='stable')[:, :k]
+            out_distances[block] = np.take_along_axis(candidate_distances, nearest, axis=1)
+            out_positions[block] = np.take_along_axis(candidate_positions, nearest, axis=1)
+        return out_distances, out_positions, features[out_positions]
+
 class TravelBudgetPredictor:
     def __init__(self, n_clusters=5):
         self.n_clusters = n_clusters
         self.kmeans = KMeans(n_clusters=n_clusters, random_state=42)
         self.scaler = StandardScaler()
         self.is_fitted = False
+        self.cluster_aggregates = None
+        self.metrics = None
+        self.pca = None
+        self.chart_sample = None
+        self.neighbor_index = None
         
     def prepare_data(self, user_data):
         """
         Prepare user data for clustering
+        
+        Accepts a list of trip dicts, a pandas DataFrame, a pyarrow Table or
+        any other iterable of trips such as a MongoDB cursor. Columnar inputs
+        go through the vectorized prepare_frame and come back as float32.
         """
+        if type(user_data).__module__.startswith('pandas'):
+            return self.prepare_frame(user_data)
+        if type(user_data).__module__.startswith('pyarrow'):
+            # Struct columns flatten to the miscellaneous.<category> names
+            return self.prepare_frame(user_data.flatten().to_pandas())
+        if not isinstance(user_data, (list, tuple)):
+            return self.prepare_frame(pd.DataFrame.from_records(list(user_data)))
+            
         features = []
         
         for user in user_data:
@@ -55,6 +380,44 @@ class TravelBudgetPredictor:
             
         return np.array(features)
     
+    def prepare_frame(self, frame):
+        """
+        Vectorized prepare_data for a DataFrame of trips
+        
+        The miscellaneous breakdown may come as miscellaneous.<category>
+        columns (pd.json_normalize, pyarrow flatten, trip_feature_pipeline)
+        or as a miscellaneous column holding dicts or old-format numbers.
+        """
+        num_rows = len(frame)
+        X = np.zeros((num_rows, len(TRIP_FIELDS) + len(MISC_CATEGORIES)), dtype=np.float32)
+        
+        def numeric(column, default):
+            return pd.to_numeric(column, errors='coerce').fillna(default).to_numpy(np.float32)
+        
+        for i, (field, default) in enumerate(TRIP_FIELDS):
+            X[:, i] = numeric(frame[field], default) if field in frame else default
+            
+        misc_offset = len(TRIP_FIELDS)
+        for j, category in enumerate(MISC_CATEGORIES):
+            column = f'miscellaneous.{category}'
+            if column in frame:
+                X[:, misc_offset + j] = numeric(frame[column], 0)
+                
+        if 'miscellaneous' in frame:
+            misc = frame['miscellaneous']
+            if misc.dtype == object:
+                is_breakdown = misc.map(type).eq(dict).to_numpy()
+                if is_breakdown.any():
+                    breakdown = pd.DataFrame(misc[is_breakdown].tolist(), columns=MISC_CATEGORIES)
+                    X[is_breakdown, misc_offset:] = breakdown.apply(numeric, args=(0,)).to_numpy(np.float32)
+                misc = misc.where(~is_breakdown)
+            # Old format: a single number that counts as shopping
+            scalar = pd.to_numeric(misc, errors='coerce').to_numpy(np.float32)
+            has_scalar = ~np.isnan(scalar)
+            X[has_scalar, misc_offset] = scalar[has_scalar]
+            
+        return X
+    
     def fit(self, user_data):
         """
         Fit the K-Means model with user data
@@ -62,22 +425,167 @@ class TravelBudgetPredictor:
         # Prepare data
         X = self.prepare_data(user_data)
         
-        # Scale the features
-        X_scaled = self.scaler.fit_transform(X)
+        # Scale the features (the model always works in float64)
+        X_scaled = self.scaler.fit_transform(np.asarray(X, dtype=np.float64))
         
         # Fit K-Means
         self.kmeans.fit(X_scaled)
         
-        # Calculate silhouette score to evaluate clustering
-        labels = self.kmeans.labels_
-        score = silhouette_score(X_scaled, labels)
-        print(f"Silhouette Score: {score:.3f}")
+        # Summarise the training trips per cluster once, for recommendations
+        labels = self.kmeans.predict(X_scaled)
+        self.cluster_aggregates = ClusterAggregates(self.n_clusters)
+        self.cluster_aggregates.add(X, labels)
+        
+        # Keep the chart projection and a sample of trips with the model
+        self.pca = PCA(n_components=2).fit(X_scaled)
+        rng = np.random.default_rng(42)
+        sample = rng.random(len(X)) < CHART_SAMPLE_SIZE / len(X)
+        self.chart_sample = self._chart_sample(X_scaled[sample], labels[sample], X[sample, 0])
+        
+        # Index the trips for similar-traveler recommendations
+        self.neighbor_index = SimilarTravelerIndex().build(X_scaled, X)
+        
+        # Quality metrics are left to evaluate(), off the training path
+        self.metrics = None
+        self.is_fitted = True
+        self.cluster_centers_ = self.kmeans.cluster_centers_
+        
+        return self
+    
+    def fit_streaming(self, make_chunks, checkpoint_path=None, epochs=1, batch_size=1024):
+        """
+        Fit the model out of core, one chunk of trips at a time
+        
+        make_chunks is called once per pass and must return a fresh iterable of
+        chunks, e.g. lambda: iter_trip_chunks(collection). The scaler is fit
+        in a first pass, MiniBatchKMeans.partial_fit runs for `epochs` passes
+        over the scaled chunks, and a last pass builds the cluster
+        aggregates, so memory is bounded by the chunk size.
+        
+        With checkpoint_path, progress is saved after every chunk and an
+        interrupted run resumes where it stopped.
+        
+        The similar-traveler index would need every trip in memory, so it is
+        not built here; call build_neighbor_index() if it is wanted.
+        """
+        state = None
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            state = joblib.load(checkpoint_path)
+            print(f"Resuming streaming fit at {state['phase']}, chunk {state['chunk']}")
+        if state is None:
+            state = {
+                'phase': 0,
+                'chunk': 0,
+                'rows': 0,
+                'scaler': StandardScaler(),
+                'kmeans': MiniBatchKMeans(n_clusters=self.n_clusters, random_state=42,
+                                          batch_size=batch_size),
+                'aggregates': ClusterAggregates(self.n_clusters),
+                'pca': IncrementalPCA(n_components=2),
+                'chart_rows': []
+            }
+            
+        def scale_step(X):
+            state['scaler'].partial_fit(X)
+            state['rows'] += len(X)
+            
+        def cluster_step(X):
+            state['kmeans'].partial_fit(state['scaler'].transform(X))
+            
+        rng = np.random.default_rng(42)
         
+        def aggregate_step(X):
+            X_scaled = state['scaler'].transform(X)
+            labels = state['kmeans'].predict(X_scaled)
+            state['aggregates'].add(X, labels)
+            if len(X) >= 2:
+                state['pca'].partial_fit(X_scaled)
+            sample = rng.random(len(X)) < CHART_SAMPLE_SIZE / state['rows']
+            state['chart_rows'].append((X_scaled[sample], labels[sample], X[sample, 0]))
+            
+        phases = [scale_step] + [cluster_step] * epochs + [aggregate_step]
+        while state['phase'] < len(phases):
+            step = phases[state['phase']]
+            for i, chunk in enumerate(make_chunks()):
+                if i < state['chunk']:
+                    continue  # already processed before the checkpoint
+                X = chunk if isinstance(chunk, np.ndarray) else self.prepare_data(chunk)
+                step(np.asarray(X, dtype=np.float64))
+                state['chunk'] = i + 1
+                if checkpoint_path:
+                    self._save_checkpoint(state, checkpoint_path)
+            state['phase'] += 1
+            state['chunk'] = 0
+            if checkpoint_path:
+                self._save_checkpoint(state, checkpoint_path)
+                
+        self.scaler = state['scaler']
+        self.kmeans = state['kmeans']
+        self.cluster_aggregates = state['aggregates']
+        self.pca = state['pca']
+        self.chart_sample = self._chart_sample(*(np.concatenate(rows) for rows in zip(*state['chart_rows'])))
+        self.neighbor_index = None
+        self.metrics = None
         self.is_fitted = True
         self.cluster_centers_ = self.kmeans.cluster_centers_
+        print(f"Streamed {state['rows']} trips through {epochs} clustering pass(es)")
         
+        if checkpoint_path:
+            os.remove(checkpoint_path)
         return self
     
+    def evaluate(self, user_data, sample_size=10000, random_state=42):
+        """
+        Compute clustering quality metrics for the fitted model
+        
+        Inertia and the Davies-Bouldin index are O(n) over all the given
+        trips. The silhouette score is O(n²), so it is estimated on a random
+        sample of sample_size trips (sample_size=None uses every trip). The
+        result is kept in self.metrics, which is saved with the model.
+        """
+        if not self.is_fitted:
+            raise ValueError("Model not fitted. Call fit() first.")
+            
+        X_scaled = self._scale(self.prepare_data(user_data))
+        labels = self.kmeans.predict(X_scaled)
+        
+        metrics = {
+            'num_trips': len(X_scaled),
+            'inertia': float(-self.kmeans.score(X_scaled)),
+            'davies_bouldin': None,
+            'silhouette': None,
+            'silhouette_sample_size': None
+        }
+        # Both scores need at least two clusters among the trips
+        if len(np.unique(labels)) > 1:
+            metrics['davies_bouldin'] = float(davies_bouldin_score(X_scaled, labels))
+            if sample_size is not None and sample_size < len(X_scaled):
+                metrics['silhouette_sample_size'] = sample_size
+            else:
+                sample_size = None
+                metrics['silhouette_sample_size'] = len(X_scaled)
+            metrics['silhouette'] = float(silhouette_score(
+                X_scaled, labels, sample_size=sample_size, random_state=random_state))
+            
+        self.metrics = metrics
+        return metrics
+    
+    def _chart_sample(self, X_scaled, labels, budgets):
+        return {
+            'projection': self.pca.transform(X_scaled).astype(np.float32),
+            'labels': labels.astype(np.int16),
+            'budgets': np.asarray(budgets, dtype=np.float64)
+        }
+    
+    def _scale(self, X):
+        # Columnar inputs arrive as float32, but the fitted model is float64
+        return self.scaler.transform(np.asarray(X, dtype=np.float64))
+    
+    def _save_checkpoint(self, state, checkpoint_path):
+        tmp_path = f"{checkpoint_path}.tmp"
+        joblib.dump(state, tmp_path)
+        os.replace(tmp_path, checkpoint_path)
+    
     def predict_cluster(self, user_data):
         """
         Predict which cluster a user belongs to
@@ -89,54 +597,63 @@ class TravelBudgetPredictor:
         X = self.prepare_data([user_data])
         
         # Scale the features
-        X_scaled = self.scaler.transform(X)
+        X_scaled = self._scale(X)
         
         # Predict cluster
         cluster = self.kmeans.predict(X_scaled)[0]
         
         return cluster
     
-    def get_cluster_stats(self, user_data, cluster_id):
+    def add_trips(self, user_data):
         """
-        Get statistics for a specific cluster
+        Fold new trips into the cluster statistics without refitting
         """
         if not self.is_fitted:
             raise ValueError("Model not fitted. Call fit() first.")
             
-        # Prepare all data
         X = self.prepare_data(user_data)
-        
-        # Get labels for all users
-        X_scaled = self.scaler.transform(X)
+        X_scaled = self._scale(X)
         labels = self.kmeans.predict(X_scaled)
+        self.cluster_aggregates.add(X, labels)
+        if self.neighbor_index is not None:
+            self.neighbor_index.add(X_scaled, X)
+        return labels
+    
+    def build_neighbor_index(self, user_data):
+        """(Re)build the similar-traveler index over the given trips"""
+        if not self.is_fitted:
+            raise ValueError("Model not fitted. Call fit() first.")
+            
+        X = self.prepare_data(user_data)
+        self.neighbor_index = SimilarTravelerIndex().build(self._scale(X), X)
+        return self.neighbor_index
+    
+    def get_cluster_stats(self, user_data, cluster_id):
+        """
+        Get statistics for a specific cluster
         
-        # Filter users in the specified cluster
-        cluster_users = [user for i, user in enumerate(user_data) if labels[i] == cluster_id]
-        
-        if not cluster_users:
-            return None
+        Pass user_data=None to read the statistics kept since fit() (O(1));
+        otherwise they are computed over the given trips.
+        """
+        if not self.is_fitted:
+            raise ValueError("Model not fitted. Call fit() first.")
             
-        # Calculate statistics for the cluster
-        stats = {
-            'cluster_id': cluster_id,
-            'num_users': len(cluster_users),
-            'avg_initial_budget': np.mean([u.get('initial_budget', 0) for u in cluster_users]),
-            'avg_accommodation': np.mean([u.get('accommodation_total', 0) for u in cluster_users]),
-            'avg_attractions': np.mean([u.get('attractions_total', 0) for u in cluster_users]),
-            'avg_food': np.mean([u.get('food_total', 0) for u in cluster_users]),
-            'avg_transport': np.mean([u.get('transport_total', 0) for u in cluster_users]),
-            'avg_misc': np.mean([u.get('misc_total', 0) for u in cluster_users]),
-            'common_food_preference': max(set([u.get('food_preference', 1) for u in cluster_users]), 
-                                        key=[u.get('food_preference', 1) for u in cluster_users].count),
-            'common_transport_type': max(set([u.get('transport_type', 1) for u in cluster_users]), 
-                                       key=[u.get('transport_type', 1) for u in cluster_users].count)
-        }
+        if user_data is None:
+            return self.cluster_aggregates.stats(cluster_id)
+            
+        # Prepare all data and get labels for all users
+        X = self.prepare_data(user_data)
+        labels = self.kmeans.predict(self._scale(X))
         
-        return stats
+        aggregates = ClusterAggregates(self.n_clusters)
+        aggregates.add(X, labels)
+        return aggregates.stats(cluster_id)
     
     def recommend_budget(self, user_data, target_user):
         """
         Recommend budget based on similar users in the same cluster
+        
+        Pass user_data=None to use the cluster statistics kept since fit().
         """
         if not self.is_fitted:
             raise ValueError("Model not fitted. Call fit() first.")
@@ -164,6 +681,114 @@ class TravelBudgetPredictor:
         
         return recommendations
     
+    def recommend_budgets(self, target_users):
+        """
+        Recommend budgets for many travelers in one vectorized pass
+        
+        target_users is anything prepare_data accepts. Returns one
+        recommend_budget(None, user) result per user, in order, with None
+        for users whose cluster has no trips.
+        """
+        if not self.is_fitted:
+            raise ValueError("Model not fitted. Call fit() first.")
+            
+        X = self.prepare_data(target_users)
+        if len(X) == 0:
+            return []
+        clusters = self.kmeans.predict(self._scale(X))
+        
+        # Per-cluster averages and labels, joined to every user by cluster id
+        aggregates = self.cluster_aggregates
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = aggregates.sums / aggregates.counts[:, None]
+        spend = dict(zip(SPEND_COLUMNS, means.T))
+        food_names = [self.get_food_preference_name(int(p))
+                      for p in np.argmax(aggregates.food_preference_counts, axis=1)]
+        transport_names = [self.get_transport_type_name(int(t))
+                           for t in np.argmax(aggregates.transport_type_counts, axis=1)]
+        profiles = [self.get_cluster_profile(c) for c in range(self.n_clusters)]
+        
+        days = np.maximum(X[:, 5], 1)
+        columns = zip(
+            clusters.tolist(),
+            spend['avg_accommodation'][clusters].tolist(),
+            spend['avg_attractions'][clusters].tolist(),
+            (spend['avg_food'][clusters] / days).tolist(),
+            (spend['avg_transport'][clusters] / days).tolist(),
+            spend['avg_misc'][clusters].tolist()
+        )
+        
+        recommendations = []
+        for cluster_id, accommodation, attractions, food, transport, misc in columns:
+            if aggregates.counts[cluster_id] == 0:
+                recommendations.append(None)
+                continue
+            recommendations.append({
+                'recommended_accommodation': accommodation,
+                'recommended_attractions': attractions,
+                'recommended_food_per_day': food,
+                'recommended_transport_per_day': transport,
+                'recommended_misc': misc,
+                'food_preference_recommendation': food_names[cluster_id],
+                'transport_type_recommendation': transport_names[cluster_id],
+                'cluster_profile': profiles[cluster_id]
+            })
+        return recommendations
+    
+    def recommend_similar(self, target_users, k=20):
+        """
+        Recommend budgets from each traveler's k most similar past trips
+        
+        Like recommend_budgets, but averages the k nearest trips in the
+        scaled feature space instead of the whole cluster. Each result also
+        reports how many trips it drew on and their mean distance.
+        """
+        if not self.is_fitted:
+            raise ValueError("Model not fitted. Call fit() first.")
+        if self.neighbor_index is None:
+            raise ValueError("No similar-traveler index. Call build_neighbor_index() first.")
+            
+        X = self.prepare_data(target_users)
+        if len(X) == 0:
+            return []
+        X_scaled = self._scale(X)
+        clusters = self.kmeans.predict(X_scaled)
+        distances, positions, neighbours = self.neighbor_index.query_rows(X_scaled, k)  # (users, k, features)
+        
+        spend = dict(zip(SPEND_COLUMNS, neighbours[:, :, list(SPEND_COLUMNS.values())].mean(axis=1, dtype=np.float64).T))
+        days = np.maximum(X[:, 5], 1)
+        
+        def most_common(column):
+            # Mode per user; the lowest code wins ties, like ClusterAggregates.stats
+            codes = neighbours[:, :, column].astype(np.int64)
+            counts = (codes[:, :, None] == np.arange(codes.max() + 1)).sum(axis=1)
+            return np.argmax(counts, axis=1)
+            
+        columns = zip(
+            clusters.tolist(),
+            spend['avg_accommodation'].tolist(),
+            spend['avg_attractions'].tolist(),
+            (spend['avg_food'] / days).tolist(),
+            (spend['avg_transport'] / days).tolist(),
+            spend['avg_misc'].tolist(),
+            most_common(FOOD_PREFERENCE_COLUMN).tolist(),
+            most_common(TRANSPORT_TYPE_COLUMN).tolist(),
+            distances.mean(axis=1).tolist()
+        )
+        return [{
+            'recommended_accommodation': accommodation,
+            'recommended_attractions': attractions,
+            'recommended_food_per_day': food,
+            'recommended_transport_per_day': transport,
+            'recommended_misc': misc,
+            'food_preference_recommendation': self.get_food_preference_name(food_preference),
+            'transport_type_recommendation': self.get_transport_type_name(transport_type),
+            'cluster_profile': self.get_cluster_profile(cluster_id),
+            'similar_travelers': positions.shape[1],
+            'mean_distance': mean_distance
+        } for (cluster_id, accommodation, attractions, food, transport, misc,
+               food_preference, transport_type, mean_distance) in columns]
+    
     def get_food_preference_name(self, preference_id):
         preferences = {
             1: "Budget Eats (₹200-500/day)",
@@ -200,40 +825,112 @@ class TravelBudgetPredictor:
             
         # Prepare data
         X = self.prepare_data(user_data)
-        X_scaled = self.scaler.transform(X)
+        X_scaled = self._scale(X)
         labels = self.kmeans.predict(X_scaled)
         
-        # Reduce dimensions for visualization (using PCA)
-        from sklearn.decomposition import PCA
-        pca = PCA(n_components=2)
-        X_reduced = pca.fit_transform(X_scaled)
+        # Reduce dimensions with the projection saved at fit time
+        if self.pca is None:
+            self.pca = PCA(n_components=2).fit(X_scaled)
+        X_reduced = self.pca.transform(X_scaled)
         
         # Create scatter plot
-        plt.figure(figsize=(10, 8))
-        scatter = plt.scatter(X_reduced[:, 0], X_reduced[:, 1], c=labels, cmap='viridis', alpha=0.7)
-        plt.colorbar(scatter, label='Cluster')
-        plt.xlabel('PCA Component 1')
-        plt.ylabel('PCA Component 2')
-        plt.title('Travel Budget Clusters')
+        fig, ax = plt.subplots(figsize=(10, 8))
+        draw_cluster_scatter(ax, X_reduced, labels)
         plt.show()
         
         # Create boxplots for each cluster's budget distribution
-        budgets = [u.get('initial_budget', 0) for u in user_data]
-        cluster_budgets = [[] for _ in range(self.n_clusters)]
-        
-        for i, budget in enumerate(budgets):
-            cluster_budgets[labels[i]].append(budget)
-        
-        plt.figure(figsize=(12, 6))
-        plt.boxplot(cluster_budgets)
-        plt.xticks(range(1, self.n_clusters+1), [f'Cluster {i}' for i in range(self.n_clusters)])
-        plt.ylabel('Initial Budget (₹)')
-        plt.title('Budget Distribution by Cluster')
-        plt.grid(True, alpha=0.3)
+        fig, ax = plt.subplots(figsize=(12, 6))
+        draw_budget_boxplot(ax, X[:, 0], labels, self.n_clusters)
         plt.show()
         
         return X_reduced, labels
 
+class BudgetModelRegistry:
+    """
+    Versioned budget models shared by every worker process
+    
+    save() stores a fitted predictor's scaler, K-Means model, cluster
+    aggregates and metrics as a new version in a ModelArtifactStore. Versions
+    are loaded with their arrays memory-mapped read-only, so all workers on
+    a host share one copy from the page cache. The active predictor is
+    swapped with a single assignment, so a request that already holds the
+    previous one finishes on it.
+    """
+    def __init__(self, model_dir, name="budget_model"):
+        self.store = ModelArtifactStore(model_dir, name)
+        self.active = (None, None)  # (version, predictor)
+        self._watch_stop = threading.Event()
+        
+    @property
+    def version(self):
+        return self.active[0]
+        
+    @property
+    def predictor(self):
+        return self.active[1]
+        
+    def save(self, predictor):
+        """Publish a fitted predictor as the latest version"""
+        if not predictor.is_fitted:
+            raise ValueError("Model not fitted. Call fit() first.")
+        return self.store.save({
+            'n_clusters': predictor.n_clusters,
+            'scaler': predictor.scaler,
+            'kmeans': predictor.kmeans,
+            'cluster_aggregates': predictor.cluster_aggregates,
+            'metrics': predictor.metrics,
+            'pca': predictor.pca,
+            'chart_sample': predictor.chart_sample,
+            'neighbor_index': predictor.neighbor_index
+        })
+        
+    def load(self, version=None):
+        """Make a version (latest by default) the active predictor; None if nothing was saved"""
+        loaded = self.store.load(version, mmap_mode='r')
+        if loaded is None:
+            return None
+            
+        version, artifact = loaded
+        predictor = TravelBudgetPredictor(n_clusters=artifact['n_clusters'])
+        predictor.scaler = artifact['scaler']
+        predictor.kmeans = artifact['kmeans']
+        predictor.cluster_aggregates = artifact['cluster_aggregates']
+        predictor.metrics = artifact['metrics']
+        predictor.pca = artifact.get('pca')
+        predictor.chart_sample = artifact.get('chart_sample')
+        predictor.neighbor_index = artifact.get('neighbor_index')
+        predictor.cluster_centers_ = predictor.kmeans.cluster_centers_
+        predictor.is_fitted = True
+        
+        self.active = (version, predictor)
+        return predictor
+        
+    def reload(self):
+        """Swap in the latest published version if it differs from the active one"""
+        latest = self.store.latest_version()
+        if latest is None or latest == self.version:
+            return False
+        self.load(latest)
+        return True
+        
+    def watch(self, interval=30.0):
+        """Poll the store in a background thread and hot-swap new versions"""
+        def poll():
+            while not self._watch_stop.wait(interval):
+                try:
+                    if self.reload():
+                        print(f"Loaded budget model version {self.version}")
+                except Exception as e:
+                    print(f"Error reloading budget model: {e}")
+                    
+        self._watch_stop.clear()
+        watcher = threading.Thread(target=poll, name="budget-model-watcher", daemon=True)
+        watcher.start()
+        return watcher
+        
+    def stop_watching(self):
+        self._watch_stop.set()
+
 # Example usage and data simulation
 def simulate_user_data(num_users=100):
     """
@@ -332,6 +1029,9 @@ def main():
     print("Training K-Means model...")
     predictor = TravelBudgetPredictor(n_clusters=5)
     predictor.fit(users)
+    metrics = predictor.evaluate(users)
+    print(f"Silhouette Score: {metrics['silhouette']:.3f}")
+    print(f"Davies-Bouldin Index: {metrics['davies_bouldin']:.3f}")
     
     # Visualize clusters
     print("Generating visualizations...")
@@ -359,7 +1059,7 @@ def main():
     
     # Get recommendations for the new user
     print("\nGenerating recommendations for new user...")
-    recommendations = predictor.recommend_budget(users, new_user)
+    recommendations = predictor.recommend_budget(None, new_user)
     
     if recommendations:
         print("\n=== BUDGET RECOMMENDATIONS ===")
@@ -375,7 +1075,7 @@ def main():
     # Show statistics for all clusters
     print("\n=== CLUSTER STATISTICS ===")
     for cluster_id in range(predictor.n_clusters):
-        stats = predictor.get_cluster_stats(users, cluster_id)
+        stats = predictor.get_cluster_stats(None, cluster_id)
         if stats:
             print(f"\nCluster {cluster_id} ({stats['num_users']} users):")
             print(f"  Average initial budget: ₹{stats['avg_initial_budget']:,.2f}")
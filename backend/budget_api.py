@@ -0,0 +1,170 @@
+# budget_api.py
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+import itertools
+import json
+import math
+import os
+import threading
+
+from budget import MISC_CATEGORIES, TRIP_FIELDS, BudgetModelRegistry, TravelBudgetPredictor
+from cluster_charts import CHARTS, FORMATS, ClusterChartRenderer
+
+budget_api = Blueprint("budget_api", __name__)
+
+# Trips scored per vectorized pass while streaming
+BATCH_SIZE = 1000
+
+# Workers sharing this directory load published versions instead of refitting
+MODEL_DIR = os.getenv("BUDGET_MODEL_DIR")
+
+# Rendered cluster charts are shared here by every worker, per model version
+CHART_DIR = os.getenv("BUDGET_CHART_DIR")
+
+_registry = None
+_predictor = None
+_predictor_lock = threading.Lock()
+_chart_renderer = ClusterChartRenderer(CHART_DIR)
+
+def train_predictor():
+    # No trip history is stored yet, so train on simulated travelers like main().
+    # They are seeded so every worker without a registry fits the same model.
+    from synthetic_data import generate_trips  # pulls in pandas; only needed to train
+    users = generate_trips(200, seed=0)
+    predictor = TravelBudgetPredictor(n_clusters=5).fit(users)
+    predictor.evaluate(users)  # metrics are saved with the published version
+    return predictor
+
+def get_active():
+    """
+    (version, predictor) to serve this request with
+
+    With BUDGET_MODEL_DIR set, this is the registry's active version, which
+    a background watcher hot-swaps when a new one is published; the pair is
+    read as one tuple so the version always belongs to the predictor. The
+    first worker to find the registry empty trains and publishes version 1.
+    Without a registry the version is None.
+    """
+    global _registry, _predictor
+    if MODEL_DIR:
+        if _registry is None:
+            with _predictor_lock:
+                if _registry is None:
+                    registry = BudgetModelRegistry(MODEL_DIR)
+                    if registry.load() is None:
+                        registry.save(train_predictor())
+                        registry.load()
+                    registry.watch()
+                    _registry = registry
+        return _registry.active
+
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                _predictor = train_predictor()
+    return None, _predictor
+
+def get_predictor():
+    """The predictor to serve this request with; see get_active"""
+    return get_active()[1]
+
+def _number(value, default, field):
+    """value as a finite float; null means the default, as in trip_feature_pipeline"""
+    if value is None:
+        return float(default)
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{field} must be a number")
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"{field} must be a number, got {value!r}")
+    if not math.isfinite(number):
+        raise ValueError(f"{field} must be finite, got {value!r}")
+    return number
+
+def numeric_trip(trip):
+    """Copy of a trip with every feature field converted by _number; raises ValueError"""
+    trip = dict(trip)
+    for field, default in TRIP_FIELDS:
+        trip[field] = _number(trip.get(field), default, field)
+    misc = trip.get('miscellaneous')
+    if isinstance(misc, dict):
+        trip['miscellaneous'] = {category: _number(misc.get(category), 0, f"miscellaneous.{category}")
+                                 for category in MISC_CATEGORIES}
+    elif misc is not None:
+        trip['miscellaneous'] = _number(misc, 0, 'miscellaneous')
+    return trip
+
+def recommend_ndjson(lines, predictor, batch_size=BATCH_SIZE):
+    """
+    Yield one NDJSON recommendation line per trip line, in input order
+
+    Lines are read and scored batch_size at a time, so neither the request
+    nor the response is ever held in memory as a whole. Blank lines are
+    skipped. A line that is not a JSON object, or whose trip fields are not
+    finite numbers, gets an {"line", "error"} reply; so does a trip that
+    fails to score, which is retried on its own if its batch fails.
+    """
+    numbered = ((n, line) for n, line in enumerate(lines, start=1) if line.strip())
+    while True:
+        batch = list(itertools.islice(numbered, batch_size))
+        if not batch:
+            return
+
+        replies = {}
+        trips = []
+        for n, line in batch:
+            try:
+                trip = json.loads(line)
+                if not isinstance(trip, dict):
+                    raise ValueError("expected a JSON object")
+                trips.append((n, numeric_trip(trip)))
+            except ValueError as e:
+                replies[n] = {"line": n, "error": str(e)}
+
+        if trips:
+            try:
+                recommendations = predictor.recommend_budgets([trip for _, trip in trips])
+                for (n, _), recommendation in zip(trips, recommendations):
+                    replies[n] = recommendation
+            except Exception as e:
+                # Headers are already sent, so score line by line rather than abort the stream
+                print(f"❌ Budget batch error, scoring lines {trips[0][0]}-{trips[-1][0]} one by one: {e}")
+                for n, trip in trips:
+                    try:
+                        replies[n] = predictor.recommend_budgets([trip])[0]
+                    except Exception as e:
+                        replies[n] = {"line": n, "error": str(e)}
+
+        for n, _ in batch:
+            yield json.dumps(replies[n]) + "\n"
+
+@budget_api.route('/api/budget/recommend-batch', methods=['POST'])
+def recommend_batch():
+    """NDJSON trips in, NDJSON recommendations streamed out"""
+    try:
+        predictor = get_predictor()
+    except Exception as e:
+        print("❌ Budget model error:", e)
+        return {"error": str(e)}, 500
+
+    return Response(
+        stream_with_context(recommend_ndjson(request.stream, predictor)),
+        mimetype="application/x-ndjson"
+    )
+
+@budget_api.route('/api/budget/cluster-charts/<chart>.<fmt>', methods=['GET'])
+def cluster_chart(chart, fmt):
+    """Cluster chart for the served model; 202 while it is first being rendered"""
+    if chart not in CHARTS or fmt not in FORMATS:
+        return jsonify({"error": f"Unknown chart {chart}.{fmt}"}), 404
+
+    try:
+        version, predictor = get_active()
+        data = _chart_renderer.get(predictor, version, chart, fmt)
+    except Exception as e:
+        print("❌ Cluster chart error:", e)
+        return jsonify({"error": str(e)}), 500
+
+    if data is None:
+        return jsonify({"status": "rendering", "version": version}), 202
+    return Response(data, mimetype=FORMATS[fmt])
@@ -0,0 +1,131 @@
+# cluster_charts.py
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from budget import draw_budget_boxplot, draw_cluster_scatter
+from lazy_imports import lazy_import
+
+# Figures are drawn straight onto the Agg canvas, never through pyplot
+Figure = lazy_import("matplotlib.figure", "Figure")
+FigureCanvasAgg = lazy_import("matplotlib.backends.backend_agg", "FigureCanvasAgg")
+
+# Chart name -> figure size in inches
+CHARTS = {
+    "scatter": (10, 8),
+    "budgets": (12, 6),
+}
+FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+
+class ClusterChartRenderer:
+    """
+    Headless cluster charts, rendered in a background thread and cached per model version
+
+    Charts are drawn from the PCA projection and trip sample saved with the
+    model, so a view never refits PCA or touches the training data. Charts
+    of the last rendered version are kept in memory. With cache_dir, they
+    are also written to cache_dir/v<version>/, where every worker sharing
+    the directory can serve them.
+    """
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._cache = {}  # (version, chart, format) -> bytes
+        self._pending = {}  # version -> Future
+        self._failed = {}  # version -> error of its failed render
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cluster-charts")
+
+    def _path(self, version, chart, fmt):
+        if self.cache_dir is None or version is None:
+            return None  # unversioned models differ per process, so only cache in memory
+        return os.path.join(self.cache_dir, f"v{version:04d}", f"{chart}.{fmt}")
+
+    def get(self, predictor, version, chart, fmt):
+        """
+        Cached chart bytes, or None while the chart is being rendered
+
+        A miss queues the model version for rendering and returns at once.
+        If rendering that version failed, the error is raised again rather
+        than retried on every request.
+        """
+        key = (version, chart, fmt)
+        data = self._cache.get(key)
+        if data is not None:
+            return data
+
+        path = self._path(version, chart, fmt)
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            self._cache[key] = data
+            return data
+
+        error = self._failed.get(version)
+        if error is not None:
+            raise RuntimeError(f"Rendering cluster charts for model version {version} failed: {error}")
+        if predictor.chart_sample is None:
+            raise ValueError("Model has no chart sample. Refit it to render cluster charts.")
+        self.submit(predictor, version)
+        return None
+
+    def submit(self, predictor, version):
+        """Render every chart for a model version in the background, once"""
+        with self._lock:
+            future = self._pending.get(version)
+            if future is not None:
+                return future
+            future = self._executor.submit(self.render, predictor, version)
+            self._pending[version] = future
+        # Outside the lock: a render that has already finished runs the callback right here
+        future.add_done_callback(lambda done: self._finished(version, done))
+        return future
+
+    def _finished(self, version, future):
+        error = future.exception()
+        with self._lock:
+            self._pending.pop(version, None)
+            if error is not None:
+                self._failed[version] = error
+        if error is not None:
+            print(f"Error rendering cluster charts for model version {version}: {error}")
+
+    def render(self, predictor, version):
+        """Render every chart and format for a model version and cache them"""
+        sample = predictor.chart_sample
+        if sample is None:
+            raise ValueError("Model has no chart sample. Refit it to render cluster charts.")
+
+        rendered = {}
+        for chart, figsize in CHARTS.items():
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+            ax = fig.add_subplot()
+            if chart == "scatter":
+                draw_cluster_scatter(ax, sample['projection'], sample['labels'])
+            else:
+                draw_budget_boxplot(ax, sample['budgets'], sample['labels'], predictor.n_clusters)
+            fig.tight_layout()
+
+            for fmt in FORMATS:
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format=fmt)
+                rendered[(version, chart, fmt)] = buffer.getvalue()
+
+        for (_, chart, fmt), data in rendered.items():
+            path = self._path(version, chart, fmt)
+            if path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+
+        # Only the last rendered version stays in memory; others remain on disk
+        self._cache = rendered
+        print(f"Rendered cluster charts for model version {version}")
+        return rendered
@@ -1,14 +1,19 @@
 # hotel.py
 from flask import Blueprint, request, jsonify
-import pandas as pd
-import folium
 import os
-import uuid
+
+from lazy_imports import lazy_import
+from hotel_store import amenity_mask, amenity_names, get_store
+from hotels_near import hotels_near as find_hotels_near
+from map_cache import MapCache
+
+# folium is imported on the first request that needs it, not at startup
+folium = lazy_import("folium")
 
 hotel_api = Blueprint("hotel_api", __name__)
 
-CSV_PATH = os.path.join(os.path.dirname(__file__), "udaipur_hotels_full.csv")
-df = pd.read_csv(CSV_PATH)
+# Rendered maps, shared by identical hotel sets; old ones are evicted
+map_cache = MapCache(os.path.join("static", "maps"), "/static/maps")
 
 @hotel_api.route('/hotel-recommend', methods=['POST'])
 def recommend_hotels():
@@ -16,45 +21,76 @@ def recommend_hotels():
         data = request.get_json()
         place = data.get("place", "").lower()
         budget = int(data.get("budget", 0))
+        # Optional price window; hotels whose range overlaps it match
+        budget_min = int(data.get("budget_min", budget))
+        budget_max = int(data.get("budget_max", budget))
 
-        if not place or not budget:
+        if not place or not budget_max:
             return jsonify({"error": "Missing place or budget"}), 400
+        if budget_min > budget_max:
+            return jsonify({"error": "budget_min is greater than budget_max"}), 400
+        # Amenities as lists or "wifi+pool" strings; preferred ones rank hotels
+        try:
+            required = amenity_mask(data.get("required_amenities"))
+            preferred = amenity_mask(data.get("preferred_amenities"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        filtered = df[
-            (df["budget_min_INR"] <= budget) & (df["budget_max_INR"] >= budget)
-        ].copy()
+        store = get_store()
+        if store.city_slice(place) is None:
+            return jsonify({"error": f"No hotels for place '{place}'", "places": store.cities}), 404
 
-        if filtered.empty:
+        positions, matches = store.search(place, budget_min, budget_max, required, preferred)
+
+        if not len(positions):
             return jsonify({"hotels": []}), 200
 
+        filtered = store.rows(positions)
+
         filtered["image"] = "https://source.unsplash.com/400x300/?hotel," + place
 
-        m = folium.Map(location=[24.58, 73.68], zoom_start=13)
-        for _, row in filtered.iterrows():
-            popup = f"{row['name']}<br>₹{row['budget_min_INR']} - ₹{row['budget_max_INR']}"
-            folium.Marker(
-                location=[row["latitude"], row["longitude"]],
-                popup=popup,
-                icon=folium.Icon(color='green', icon='info-sign')
-            ).add_to(m)
-
-        map_id = str(uuid.uuid4())
-        map_dir = os.path.join("static", "maps")
-        os.makedirs(map_dir, exist_ok=True)
-        map_path = os.path.join(map_dir, f"{map_id}.html")
-        m.save(map_path)
+        map_columns = ["name", "budget_min_INR", "budget_max_INR", "latitude", "longitude"]
+        map_key = map_cache.key(__name__, filtered[map_columns].to_json(orient="values"))
+
+        def render(path):
+            m = folium.Map(location=[filtered["latitude"].mean(), filtered["longitude"].mean()], zoom_start=13)
+            for _, row in filtered.iterrows():
+                popup = f"{row['name']}<br>₹{row['budget_min_INR']} - ₹{row['budget_max_INR']}"
+                folium.Marker(
+                    location=[row["latitude"], row["longitude"]],
+                    popup=popup,
+                    icon=folium.Icon(color='green', icon='info-sign')
+                ).add_to(m)
+            m.save(path)
+
+        map_url = map_cache.get_or_render(map_key, render)
 
         hotels = filtered[["name", "budget_min_INR", "latitude", "longitude", "image"]].to_dict(orient="records")
         for h in hotels:
             h["price"] = h.pop("budget_min_INR")
             h["lat"] = h.pop("latitude")
             h["lon"] = h.pop("longitude")
+        for h, mask, count in zip(hotels, filtered["amenity_mask"], matches):
+            h["amenities"] = amenity_names(int(mask))
+            if preferred:
+                h["preferredMatches"] = int(count)
 
         return jsonify({
             "hotels": hotels,
-            "mapUrl": f"/static/maps/{map_id}.html"
+            "mapUrl": map_url
         })
 
     except Exception as e:
         print("❌ Hotel API Error:", str(e))
         return jsonify({"error": str(e)}), 500
+
+@hotel_api.route('/hotels-near', methods=['POST'])
+def hotels_near():
+    """Hotels nearest to a point, to the centroid of a list of points, or to an itinerary's attractions"""
+    body, status = find_hotels_near(request.get_json(silent=True))
+    return jsonify(body), status
+
+@hotel_api.route('/hotel-map-cache', methods=['GET'])
+def hotel_map_cache_stats():
+    """Map cache hit/miss/eviction counters for this worker"""
+    return jsonify(map_cache.stats())
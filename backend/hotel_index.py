@@ -0,0 +1,182 @@
+# hotel_index.py
+import numpy as np
+
+from lazy_imports import lazy_import
+from routing import EARTH_RADIUS_KM, haversine_distances
+
+KDTree = lazy_import('sklearn.neighbors', 'KDTree')
+
+
+class BudgetIntervalIndex:
+    """
+    Centered interval tree over hotel price ranges [budget_min, budget_max]
+
+    Each node keeps the ranges that contain its center twice, sorted by
+    minimum and by maximum, so the ranges matching a query are always a
+    prefix of one of those lists. A single budget visits one node per tree
+    level, which makes queries O(log n + k) for k matches. Hotels without a
+    finite price range are left out. Results are row positions into the
+    arrays the index was built from, in ascending order.
+    Nodes live in flat NumPy arrays, so the index is cheap to keep per process.
+    """
+    def __init__(self, budget_min, budget_max):
+        self.budget_min = np.asarray(budget_min, dtype=np.float64)
+        self.budget_max = np.asarray(budget_max, dtype=np.float64)
+        if self.budget_min.shape != self.budget_max.shape:
+            raise ValueError("budget_min and budget_max must have the same length")
+        # A NaN center would fail every comparison and drop its whole subtree
+        self.rows = np.flatnonzero(np.isfinite(self.budget_min) & np.isfinite(self.budget_max))
+
+        centers, lefts, rights, starts, ends = [], [], [], [], []
+        by_min, by_max = [], []
+        offset = 0
+
+        # Iterative build; children are patched in once they get node ids
+        self.root = -1
+        stack = [(self.rows, None, None)]
+        while stack:
+            rows, parent, side = stack.pop()
+            if not len(rows):
+                continue
+            lo, hi = self.budget_min[rows], self.budget_max[rows]
+            center = np.median(np.concatenate([lo, hi]))
+            here = (lo <= center) & (hi >= center)
+
+            node = len(centers)
+            members = rows[here]
+            centers.append(center)
+            lefts.append(-1)
+            rights.append(-1)
+            starts.append(offset)
+            ends.append(offset + len(members))
+            offset += len(members)
+            by_min.append(members[np.argsort(self.budget_min[members], kind='stable')])
+            by_max.append(members[np.argsort(-self.budget_max[members], kind='stable')])
+
+            if parent is None:
+                self.root = node
+            elif side == 'left':
+                lefts[parent] = node
+            else:
+                rights[parent] = node
+            stack.append((rows[hi < center], node, 'left'))
+            stack.append((rows[lo > center], node, 'right'))
+
+        self.centers = np.array(centers)
+        self.lefts = np.array(lefts, dtype=np.intp)
+        self.rights = np.array(rights, dtype=np.intp)
+        self.starts = np.array(starts, dtype=np.intp)
+        self.ends = np.array(ends, dtype=np.intp)
+        self.by_min = np.concatenate(by_min) if by_min else np.empty(0, dtype=np.intp)
+        self.by_max = np.concatenate(by_max) if by_max else np.empty(0, dtype=np.intp)
+        # Sorted keys for searchsorted; maxima are negated to sort ascending
+        self.min_keys = self.budget_min[self.by_min]
+        self.max_keys = -self.budget_max[self.by_max]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _collect(self, parts):
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(parts))
+
+    def stab(self, budget):
+        """Positions of hotels whose range contains budget"""
+        return self.overlap(budget, budget)
+
+    def overlap(self, low, high):
+        """Positions of hotels whose range overlaps [low, high]"""
+        if low > high:
+            raise ValueError("low must not be greater than high")
+        parts = []
+        stack = [self.root] if self.root >= 0 else []
+        while stack:
+            node = stack.pop()
+            start, end, center = self.starts[node], self.ends[node], self.centers[node]
+            if high < center:
+                # Every range here reaches past high, so only the minimum matters
+                count = np.searchsorted(self.min_keys[start:end], high, side='right')
+                parts.append(self.by_min[start:start + count])
+                child = self.lefts[node]
+            elif low > center:
+                # Every range here starts before low, so only the maximum matters
+                count = np.searchsorted(self.max_keys[start:end], -low, side='right')
+                parts.append(self.by_max[start:start + count])
+                child = self.rights[node]
+            else:
+                # The query covers the center, so every range here overlaps it
+                parts.append(self.by_min[start:end])
+                for child in (self.lefts[node], self.rights[node]):
+                    if child >= 0:
+                        stack.append(child)
+                continue
+            if child >= 0:
+                stack.append(child)
+        return self._collect(parts)
+
+
+# Relative and absolute slack on radius queries in the projected plane
+RADIUS_MARGIN = 0.05
+RADIUS_MARGIN_KM = 0.05
+
+
+class HotelSpatialIndex:
+    """
+    KD-tree over hotel coordinates for nearest and radius queries
+
+    Coordinates are projected to kilometres on a plane tangent at the mean
+    latitude (equirectangular), which is accurate to well under 1% across a
+    city. Radius queries search the tree with a small margin and keep the
+    hits whose exact great-circle distance is within the radius; returned
+    distances are always great-circle kilometres. Hotels
+    without coordinates are left out. Results are row positions into the
+    arrays the index was built from, nearest first.
+    """
+    def __init__(self, latitude, longitude, leaf_size=40):
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        if latitude.shape != longitude.shape:
+            raise ValueError("latitude and longitude must have the same length")
+        self.rows = np.flatnonzero(np.isfinite(latitude) & np.isfinite(longitude))
+        self.latitude = latitude[self.rows]
+        self.longitude = longitude[self.rows]
+        self.lat0 = float(self.latitude.mean()) if len(self.rows) else 0.0
+        self.tree = KDTree(self.project(self.latitude, self.longitude), leaf_size=leaf_size) \
+            if len(self.rows) else None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def project(self, latitude, longitude):
+        """(n, 2) array of x/y kilometres on the index's plane"""
+        lat = np.radians(np.atleast_1d(np.asarray(latitude, dtype=np.float64)))
+        lon = np.radians(np.atleast_1d(np.asarray(longitude, dtype=np.float64)))
+        return np.column_stack([EARTH_RADIUS_KM * lon * np.cos(np.radians(self.lat0)),
+                                EARTH_RADIUS_KM * lat])
+
+    def _result(self, latitude, longitude, found):
+        distances = haversine_distances([latitude], [longitude],
+                                        self.latitude[found], self.longitude[found])[0]
+        order = np.argsort(distances, kind='stable')
+        return self.rows[found[order]], distances[order]
+
+    def nearest(self, latitude, longitude, k=10):
+        """(positions, km) of the k hotels nearest to a point"""
+        k = min(int(k), len(self.rows))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        _, found = self.tree.query(self.project(latitude, longitude), k=k)
+        return self._result(latitude, longitude, found[0])
+
+    def within(self, latitude, longitude, radius_km):
+        """(positions, km) of the hotels within radius_km of a point"""
+        if radius_km < 0:
+            raise ValueError("radius_km must not be negative")
+        if self.tree is None:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        search_km = radius_km * (1 + RADIUS_MARGIN) + RADIUS_MARGIN_KM
+        found = self.tree.query_radius(self.project(latitude, longitude), r=search_km)[0]
+        positions, distances = self._result(latitude, longitude, found.astype(np.intp))
+        keep = distances <= radius_km
+        return positions[keep], distances[keep]
@@ -0,0 +1,321 @@
+# hotel_store.py
+"""
+One columnar store for the hotels of every city.
+
+The <city>_hotels_full.csv files are ingested once into a single Arrow IPC
+file, sorted by city, with a dictionary-encoded (categorical) city column:
+    python hotel_store.py                         # frontend/public -> data/hotels.arrow
+    python hotel_store.py --csv-dir some/dir --out hotels.arrow
+
+Serving processes memory-map that file, so workers share one copy of the
+pages and never parse a CSV. The row range of each city is stored in the
+file's metadata, so a city filter is a slice rather than a string compare.
+The 16 Yes/No amenity columns are also packed into one uint16 bitmask per
+hotel, so amenity filters and rankings are integer operations.
+"""
+import argparse
+import glob
+import json
+import os
+import threading
+
+import numpy as np
+
+from hotel_index import BudgetIntervalIndex, HotelSpatialIndex
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+ipc = lazy_import("pyarrow.ipc")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_DIR = os.getenv("HOTEL_CSV_DIR", os.path.join(BASE_DIR, "..", "frontend", "public"))
+STORE_PATH = os.getenv("HOTEL_STORE_PATH", os.path.join(BASE_DIR, "data", "hotels.arrow"))
+CSV_SUFFIX = "_hotels_full.csv"
+OFFSETS_KEY = b"city_offsets"
+VERSION_KEY = b"store_version"
+# Bumped whenever build_store changes what it writes; older files are rebuilt
+STORE_VERSION = 2
+
+# Amenity columns of the hotel CSVs; bit i of the amenity mask is AMENITIES[i]
+AMENITIES = [
+    "pool", "wifi", "breakfast_included", "parking", "ac", "pet_friendly", "gym", "spa",
+    "restaurant", "front_desk_24h", "family_friendly", "bar", "laundry_service",
+    "room_service", "accessible_rooms", "non_smoking_rooms",
+]
+AMENITY_BITS = {name: 1 << bit for bit, name in enumerate(AMENITIES)}
+# Set bits of every uint16; np.bitwise_count needs NumPy 2
+POPCOUNT16 = np.unpackbits(np.arange(1 << 16, dtype=np.uint16).view(np.uint8)).reshape(-1, 16).sum(
+    axis=1, dtype=np.uint8)
+
+
+def city_csvs(csv_dir=CSV_DIR):
+    """City name -> path of its hotel CSV"""
+    paths = sorted(glob.glob(os.path.join(csv_dir, f"*{CSV_SUFFIX}")))
+    return {os.path.basename(path)[:-len(CSV_SUFFIX)].lower(): path for path in paths}
+
+
+def amenity_mask(names):
+    """Bitmask of a list of amenity names, or of one comma/plus separated string; raises ValueError"""
+    if isinstance(names, str):
+        names = names.replace("+", ",").split(",")
+    elif names is not None and not isinstance(names, (list, tuple)):
+        raise ValueError(f"Amenities must be a list or a string, got {names!r}")
+    mask = 0
+    for name in names or []:
+        if not isinstance(name, str):
+            raise ValueError(f"Amenity names must be strings, got {name!r}")
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in AMENITY_BITS:
+            raise ValueError(f"Unknown amenity '{name}'. Known amenities: {', '.join(AMENITIES)}")
+        mask |= AMENITY_BITS[name]
+    return mask
+
+
+def amenity_names(mask):
+    """Amenity names set in a bitmask"""
+    return [name for name, bit in AMENITY_BITS.items() if mask & bit]
+
+
+def pack_amenities(frame):
+    """uint16 amenity bitmask of every row, from the Yes/No amenity columns"""
+    mask = np.zeros(len(frame), dtype=np.uint16)
+    for name, bit in AMENITY_BITS.items():
+        if name in frame:
+            has_it = frame[name].astype(str).str.strip().str.lower().eq("yes").to_numpy()
+            mask |= np.where(has_it, bit, 0).astype(np.uint16)
+    return mask
+
+
+def read_city_csvs(csv_dir=CSV_DIR):
+    """City name -> hotel DataFrame, parsed from the CSVs"""
+    return {city: pd.read_csv(path) for city, path in city_csvs(csv_dir).items()}
+
+
+def build_store(frames, path=STORE_PATH):
+    """
+    Write {city: DataFrame} as one Arrow file sorted by city
+
+    Returns {city: (start, end)}, the row range of each city.
+    """
+    cities = sorted(frames)
+    if not cities:
+        raise ValueError("No hotel tables to store")
+
+    offsets, parts, start = {}, [], 0
+    for city in cities:
+        frame = frames[city]
+        offsets[city] = (start, start + len(frame))
+        start += len(frame)
+        parts.append(frame)
+    data = pd.concat(parts, ignore_index=True)
+    data.insert(0, "city", pd.Categorical(np.repeat(cities, [len(frames[c]) for c in cities]),
+                                          categories=cities))
+    data["amenity_mask"] = pack_amenities(data)
+
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    table = table.replace_schema_metadata({
+        OFFSETS_KEY: json.dumps(offsets).encode("utf-8"),
+        VERSION_KEY: str(STORE_VERSION).encode("utf-8"),
+    })
+    # One record batch keeps every column a single contiguous, zero-copy array
+    table = table.combine_chunks()
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    print(f"Hotel store: {len(data)} hotels from {len(cities)} cities written to {path}")
+    return offsets
+
+
+class HotelStore:
+    """
+    Memory-mapped view of the hotel store file
+
+    Numeric columns come back as read-only NumPy arrays over the mapped file,
+    and only the rows a request returns are turned into a DataFrame.
+    Positions are row numbers in the whole store.
+    """
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._source = pa.memory_map(path, "r")
+        self.table = ipc.open_file(self._source).read_all()
+        metadata = self.table.schema.metadata or {}
+        if OFFSETS_KEY not in metadata:
+            raise ValueError(f"{path} has no city offsets. Rebuild it with hotel_store.py.")
+        self.offsets = {city: tuple(span) for city, span in json.loads(metadata[OFFSETS_KEY]).items()}
+        self.version = int(metadata.get(VERSION_KEY, b"1"))
+        self._columns = {}
+        self._indexes = {}  # (kind, city) -> index over the city's rows
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.table.num_rows
+
+    @property
+    def cities(self):
+        return list(self.offsets)
+
+    def city_slice(self, city):
+        """Row range of a city, or None if the store has no hotels there"""
+        span = self.offsets.get(city)
+        return slice(*span) if span else None
+
+    def column(self, name):
+        """Whole column as a NumPy array; zero-copy for numeric columns"""
+        array = self._columns.get(name)
+        if array is None:
+            array = self.table.column(name).to_numpy()
+            self._columns[name] = array
+        return array
+
+    def _city_index(self, kind, city, build, *columns):
+        index = self._indexes.get((kind, city))
+        if index is None:
+            rows = self.city_slice(city)
+            with self._lock:
+                index = self._indexes.get((kind, city))
+                if index is None:
+                    index = build(*(self.column(name)[rows] for name in columns))
+                    self._indexes[(kind, city)] = index
+        return index
+
+    def budget_index(self, city):
+        """Interval index over one city's price ranges, built on first use"""
+        return self._city_index("budget", city, BudgetIntervalIndex, "budget_min_INR", "budget_max_INR")
+
+    def spatial_index(self, city):
+        """KD-tree over one city's hotel coordinates, built on first use"""
+        return self._city_index("spatial", city, HotelSpatialIndex, "latitude", "longitude")
+
+    def budget_positions(self, city, budget_min, budget_max):
+        """Positions of a city's hotels whose price range overlaps [budget_min, budget_max]"""
+        rows = self.city_slice(city)
+        if rows is None:
+            return np.empty(0, dtype=np.intp)
+        return self.budget_index(city).overlap(budget_min, budget_max) + rows.start
+
+    def search(self, city, budget_min, budget_max, required=0, preferred=0):
+        """
+        Positions of a city's hotels in the price window that have every
+        required amenity, and how many preferred amenities each one has
+
+        required and preferred are amenity bitmasks. With preferred set, the
+        hotels are ordered by that count, most first; ties keep store order.
+        """
+        positions = self.budget_positions(city, budget_min, budget_max)
+        masks = self.column("amenity_mask")[positions]
+        if required:
+            keep = (masks & required) == required
+            positions, masks = positions[keep], masks[keep]
+        matches = POPCOUNT16[masks & preferred]
+        if preferred:
+            order = np.argsort(-matches.astype(np.int8), kind="stable")
+            positions, matches = positions[order], matches[order]
+        return positions, matches
+
+    def near(self, city, points, k=10, radius_km=None):
+        """
+        Hotels of a city nearest to the centroid of (latitude, longitude) points
+
+        Returns (positions, km, centroid), nearest first: the k nearest hotels,
+        or with radius_km every hotel within that distance. Raises ValueError
+        unless points is a list of finite (latitude, longitude) pairs.
+        """
+        rows = self.city_slice(city)
+        points = np.asarray(points, dtype=np.float64)
+        if points.size == 0:
+            points = points.reshape(0, 2)
+        if points.ndim != 2 or points.shape[1] != 2:
+            raise ValueError(f"points must be (latitude, longitude) pairs, got an array of shape {points.shape}")
+        if not np.isfinite(points).all():
+            raise ValueError("points must be finite")
+        if rows is None or not len(points):
+            return np.empty(0, dtype=np.intp), np.empty(0), None
+        latitude, longitude = points.mean(axis=0)
+        index = self.spatial_index(city)
+        if radius_km is not None:
+            positions, distances = index.within(latitude, longitude, radius_km)
+        else:
+            positions, distances = index.nearest(latitude, longitude, k)
+        return positions + rows.start, distances, (float(latitude), float(longitude))
+
+    def rows(self, positions):
+        """DataFrame of the hotels at the given positions"""
+        return self.table.take(pa.array(positions, type=pa.int64())).to_pandas()
+
+
+def itinerary_points(itinerary, day=None):
+    """
+    (latitude, longitude) of an itinerary's attractions, of every day or of days[day]
+
+    Raises ValueError unless day is None or an integer index of an existing day.
+    """
+    days = itinerary.get("days", [])
+    if day is not None:
+        if isinstance(day, bool) or not isinstance(day, int) or not 0 <= day < len(days):
+            raise ValueError(f"day must be an integer from 0 to {len(days) - 1}, got {day!r}")
+        days = [days[day]]
+    points = []
+    for schedule in days:
+        for attraction in schedule.get("attractions", []):
+            location = attraction.get("location") or {}
+            if location.get("latitude") is not None and location.get("longitude") is not None:
+                points.append((float(location["latitude"]), float(location["longitude"])))
+    return points
+
+
+def _stale(path, csv_dir):
+    if not os.path.exists(path):
+        return True
+    built = os.path.getmtime(path)
+    return any(os.path.getmtime(csv) > built for csv in city_csvs(csv_dir).values())
+
+
+def _open_store(path, csv_dir):
+    if not _stale(path, csv_dir):
+        store = HotelStore(path)
+        if store.version == STORE_VERSION:
+            return store
+    print("Hotel store missing or out of date; building it from the CSVs")
+    build_store(read_city_csvs(csv_dir), path)
+    return HotelStore(path)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """
+    Process-wide HotelStore, opened on first use
+
+    The store file is (re)built from the CSVs only when it is missing, older
+    than one of them or written by an older build_store; normally it is
+    just mapped.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _open_store(STORE_PATH, CSV_DIR)
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the hotel store from the city hotel CSVs")
+    parser.add_argument("--csv-dir", default=CSV_DIR)
+    parser.add_argument("--out", default=STORE_PATH)
+    args = parser.parse_args()
+
+    offsets = build_store(read_city_csvs(args.csv_dir), args.out)
+    for city, (start, end) in offsets.items():
+        print(f"  {city}: rows {start}-{end}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# hotels_near.py
+"""
+The hotels-near lookup behind the /hotels-near route of both hotel blueprints.
+"""
+import os
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from lazy_imports import lazy_import
+from hotel_store import amenity_names, get_store, itinerary_points
+
+# pymongo is imported the first time an itinerary is looked up, not at startup
+MongoClient = lazy_import("pymongo", "MongoClient")
+
+# Saved itineraries (see ItineraryGenerator.save_itinerary_to_db), opened on first use
+ITINERARY_MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+_itineraries = None
+
+def get_itineraries():
+    global _itineraries
+    if _itineraries is None:
+        _itineraries = MongoClient(ITINERARY_MONGO_URI)["touristattractions"]["itineraries"]
+    return _itineraries
+
+def hotels_near(data):
+    """
+    (body, status) for a hotels-near request
+
+    Hotels nearest to a point, to the centroid of a list of points, or to an
+    itinerary's attractions; with radius_km, every hotel within that distance.
+    """
+    try:
+        if not isinstance(data, dict):
+            return {"error": "Expected a JSON object"}, 400
+        place = str(data.get("place") or "").lower()
+        points = data.get("points")
+
+        itinerary_id = data.get("itinerary_id")
+        if itinerary_id:
+            try:
+                object_id = ObjectId(itinerary_id)
+            except (InvalidId, TypeError):
+                return {"error": f"Invalid itinerary_id '{itinerary_id}'"}, 400
+            itinerary = get_itineraries().find_one({"_id": object_id})
+            if itinerary is None:
+                return {"error": f"No itinerary with id '{itinerary_id}'"}, 404
+            place = place or itinerary.get("city", "").lower()
+            try:
+                points = itinerary_points(itinerary, data.get("day"))
+            except ValueError as e:
+                return {"error": str(e)}, 400
+        elif points is None and "lat" in data and "lon" in data:
+            points = [[data["lat"], data["lon"]]]
+
+        if not place or not points:
+            return {"error": "Missing place, or itinerary_id / points"}, 400
+        try:
+            # Points as [lat, lon] pairs or {"lat", "lon"} objects
+            points = [[p["lat"], p["lon"]] if isinstance(p, dict) else p for p in points]
+            k = int(data.get("k", 10))
+            radius_km = data.get("radius_km")
+            radius_km = None if radius_km is None else float(radius_km)
+            store = get_store()
+            if store.city_slice(place) is None:
+                return {"error": f"No hotels for place '{place}'", "places": store.cities}, 404
+            positions, distances, center = store.near(place, points, k, radius_km)
+        except (KeyError, TypeError, ValueError) as e:
+            return {"error": f"Invalid points, k or radius_km: {e}"}, 400
+
+        found = store.rows(positions)
+        hotels = found[["name", "budget_min_INR", "latitude", "longitude"]].to_dict(orient="records")
+        for h, mask, distance in zip(hotels, found["amenity_mask"], distances):
+            h["price"] = h.pop("budget_min_INR")
+            h["lat"] = h.pop("latitude")
+            h["lon"] = h.pop("longitude")
+            h["amenities"] = amenity_names(int(mask))
+            h["distance_km"] = round(float(distance), 3)
+
+        return {
+            "hotels": hotels,
+            "center": {"lat": center[0], "lon": center[1]} if center else None
+        }, 200
+
+    except Exception as e:
+        print("❌ Hotels Near API Error:", str(e))
+        return {"error": str(e)}, 500
@@ -0,0 +1,42 @@
+# lazy_imports.py
+import importlib
+
+
+class LazyImport:
+    """
+    Stand-in for a module, or a name inside one, that is imported on first use
+
+    Heavy dependencies (sklearn, pandas, matplotlib, folium) are bound at
+    module level through lazy_import, so importing a backend module stays
+    cheap and a worker only pays for the libraries its requests touch. The
+    real import happens the first time an attribute is read or the stand-in
+    is called.
+    """
+    def __init__(self, module_name, attribute=None):
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            module = importlib.import_module(self._module_name)
+            self._target = getattr(module, self._attribute) if self._attribute else module
+        return self._target
+
+    def __getattr__(self, name):
+        if name.startswith("_") and name in ("_module_name", "_attribute", "_target"):
+            raise AttributeError(name)  # not initialised yet, e.g. while copying
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        target = f"{self._module_name}.{self._attribute}" if self._attribute else self._module_name
+        state = "loaded" if self._target is not None else "not loaded"
+        return f"<lazy import {target} ({state})>"
+
+
+def lazy_import(module_name, attribute=None):
+    """lazy_import("pandas") for a module, lazy_import("sklearn.cluster", "KMeans") for a name in one"""
+    return LazyImport(module_name, attribute)
@@ -0,0 +1,95 @@
+# map_cache.py
+import hashlib
+import os
+import threading
+
+
+class MapCache:
+    """
+    Content-addressed, size-bounded cache of rendered map HTML files
+
+    A map is stored as <map_dir>/<sha256 of its content key>.html. Requests
+    that show the same hotels therefore share one file, and a hit never
+    calls the renderer. Hits refresh the file's mtime. Once the directory
+    holds more than max_files maps or max_bytes bytes, the least recently
+    used ones are deleted. Workers that share map_dir share the files, but
+    each process keeps its own counters.
+    """
+    def __init__(self, map_dir, url_prefix, max_files=500, max_bytes=200 * 1024 * 1024):
+        self.map_dir = map_dir
+        self.url_prefix = url_prefix
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def key(self, *parts):
+        """Content hash of everything that affects the rendered map"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get_or_render(self, key, render):
+        """
+        URL of the map for key, calling render(path) to write it on a miss
+
+        render must write the complete HTML file to the path it is given.
+        """
+        path = os.path.join(self.map_dir, f"{key}.html")
+        try:
+            os.utime(path)  # mark as recently used
+            with self._lock:
+                self.hits += 1
+            return f"{self.url_prefix}/{key}.html"
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            self.misses += 1
+        os.makedirs(self.map_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        render(tmp_path)
+        os.replace(tmp_path, path)
+        self._evict()
+        return f"{self.url_prefix}/{key}.html"
+
+    def _evict(self):
+        """Delete least recently used maps until the directory is within bounds"""
+        entries = []
+        with os.scandir(self.map_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".html"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue  # removed by another worker
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        count = len(entries)
+        entries.sort()
+        for _, size, path in entries:
+            if count <= self.max_files and total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                with self._lock:
+                    self.evictions += 1
+            except FileNotFoundError:
+                pass
+            count -= 1
+            total_bytes -= size
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "max_files": self.max_files,
+                "max_bytes": self.max_bytes,
+            }
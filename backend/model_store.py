@@ -0,0 +1,79 @@
+# model_store.py
+import os
+import re
+from typing import Dict, List, Optional
+
+from lazy_imports import lazy_import
+
+joblib = lazy_import("joblib")
+
+
+class ModelArtifactStore:
+    """
+    Versioned joblib artifacts for a trained model
+    
+    Each save writes <name>_v<N>.joblib and then atomically repoints the
+    LATEST file at it, so workers sharing model_dir only ever see complete
+    artifacts and can pick up new versions without a restart.
+    """
+    POINTER_FILE = "LATEST"
+    
+    def __init__(self, model_dir: str, name: str = "suitability_model"):
+        self.model_dir = model_dir
+        self.name = name
+        os.makedirs(model_dir, exist_ok=True)
+        
+    def artifact_path(self, version: int) -> str:
+        return os.path.join(self.model_dir, f"{self.name}_v{version:04d}.joblib")
+        
+    def versions(self) -> List[int]:
+        """List all saved versions in ascending order"""
+        pattern = re.compile(rf"^{re.escape(self.name)}_v(\d+)\.joblib$")
+        matches = (pattern.match(f) for f in os.listdir(self.model_dir))
+        return sorted(int(m.group(1)) for m in matches if m)
+        
+    def latest_version(self) -> Optional[int]:
+        """Version the LATEST pointer refers to, or None if nothing was published"""
+        try:
+            with open(os.path.join(self.model_dir, self.POINTER_FILE)) as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+            
+    def save(self, artifact: Dict) -> int:
+        """Write the artifact as a new version and publish it as latest"""
+        version = max(self.versions(), default=0) + 1
+        while True:
+            # O_EXCL claims the version number even if workers save concurrently
+            try:
+                fd = os.open(self.artifact_path(version), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                version += 1
+        with os.fdopen(fd, "wb") as f:
+            joblib.dump(artifact, f)
+        self.publish(version)
+        return version
+        
+    def publish(self, version: int):
+        """Atomically point LATEST at an existing version"""
+        if not os.path.exists(self.artifact_path(version)):
+            raise ValueError(f"No model artifact for version {version}")
+        pointer = os.path.join(self.model_dir, self.POINTER_FILE)
+        tmp_path = f"{pointer}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(version))
+        os.replace(tmp_path, pointer)
+        
+    def load(self, version: Optional[int] = None, mmap_mode: Optional[str] = None):
+        """
+        Load (version, artifact) for a version, defaulting to latest; None if empty
+        
+        With mmap_mode='r' the artifact's NumPy arrays are memory-mapped
+        read-only instead of copied into each process.
+        """
+        if version is None:
+            version = self.latest_version()
+            if version is None:
+                return None
+        return version, joblib.load(self.artifact_path(version), mmap_mode=mmap_mode)
@@ -0,0 +1,301 @@
+# routing.py
+import json
+import os
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Travel time model for moving between attractions inside a city
+CITY_SPEED_KMH = 20.0
+TRAVEL_BUFFER_MIN = 10  # parking, tickets, walking to the entrance
+
+
+def haversine_distances(lat_a: Sequence[float], lon_a: Sequence[float],
+                        lat_b: Sequence[float], lon_b: Sequence[float]) -> np.ndarray:
+    """
+    Great-circle distances in km from every point in a to every point in b
+
+    Points with missing coordinates are treated as zero distance from every
+    other point, so they never drive the route.
+    """
+    lat_a = np.radians(np.asarray(lat_a, dtype=float))[:, None]
+    lon_a = np.radians(np.asarray(lon_a, dtype=float))[:, None]
+    lat_b = np.radians(np.asarray(lat_b, dtype=float))[None, :]
+    lon_b = np.radians(np.asarray(lon_b, dtype=float))[None, :]
+
+    a = np.sin((lat_a - lat_b) / 2) ** 2 + np.cos(lat_a) * np.cos(lat_b) * np.sin((lon_a - lon_b) / 2) ** 2
+    distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    return np.nan_to_num(distances, nan=0.0)
+
+
+def haversine_matrix(latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+    """Pairwise great-circle distances in km between points"""
+    return haversine_distances(latitudes, longitudes, latitudes, longitudes)
+
+
+def travel_minutes_matrix(distances: np.ndarray) -> np.ndarray:
+    """Whole travel minutes between points for a distance matrix in km"""
+    minutes = np.ceil(distances / CITY_SPEED_KMH * 60).astype(int) + TRAVEL_BUFFER_MIN
+    np.fill_diagonal(minutes, 0)
+    return minutes
+
+
+class DayRouteOptimizer:
+    """
+    Orders one day's stops to minimise travel while respecting opening windows
+
+    Routes are compared on (minutes past closing, km travelled, finish time),
+    so a feasible route always beats an infeasible one. Candidates are seeded
+    with nearest-neighbour tours and improved with 2-opt and or-opt moves
+    until no move helps or the deadline passes.
+    """
+    def __init__(self, distances: np.ndarray, travel_minutes: np.ndarray,
+                 open_times: List[int], close_times: List[int], durations: List[int],
+                 start_time: int):
+        # Plain lists are much faster than NumPy scalars in the move loops
+        self.distances = distances.tolist()
+        self.travel_minutes = travel_minutes.tolist()
+        self.open_times = list(open_times)
+        self.close_times = list(close_times)
+        self.durations = list(durations)
+        self.start_time = start_time
+        self.size = len(self.durations)
+
+    def schedule(self, order: List[int]) -> List[Tuple[int, int]]:
+        """(start, end) minutes for each stop when visited in this order"""
+        times = []
+        current_time = self.start_time
+        previous = None
+        for stop in order:
+            if previous is not None:
+                current_time += self.travel_minutes[previous][stop]
+            current_time = max(current_time, self.open_times[stop])
+            times.append((current_time, current_time + self.durations[stop]))
+            current_time += self.durations[stop]
+            previous = stop
+        return times
+
+    def cost(self, order: List[int]) -> Tuple[int, float, int]:
+        late = 0
+        distance = 0.0
+        current_time = self.start_time
+        previous = None
+        for stop in order:
+            if previous is not None:
+                current_time += self.travel_minutes[previous][stop]
+                distance += self.distances[previous][stop]
+            current_time = max(current_time, self.open_times[stop]) + self.durations[stop]
+            late += max(0, current_time - self.close_times[stop])
+            previous = stop
+        return late, distance, current_time
+
+    def route_length(self, order: List[int]) -> float:
+        return sum(self.distances[a][b] for a, b in zip(order, order[1:]))
+
+    def nearest_neighbour(self, first: int) -> List[int]:
+        order = [first]
+        remaining = set(range(self.size)) - {first}
+        while remaining:
+            row = self.distances[order[-1]]
+            # Ties go to the stop that opens first, then the lower index
+            nearest = min(remaining, key=lambda stop: (row[stop], self.open_times[stop], stop))
+            order.append(nearest)
+            remaining.remove(nearest)
+        return order
+
+    def improve(self, order: List[int], deadline: float) -> Tuple[List[int], Tuple]:
+        """Apply improving 2-opt and or-opt moves until none helps or time runs out"""
+        best_cost = self.cost(order)
+        improved = True
+        while improved and time.monotonic() < deadline:
+            improved = False
+
+            # 2-opt: reverse the segment order[i..j]
+            for i in range(self.size - 1):
+                for j in range(i + 1, self.size):
+                    candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                    candidate_cost = self.cost(candidate)
+                    if candidate_cost < best_cost:
+                        order, best_cost, improved = candidate, candidate_cost, True
+                    if time.monotonic() >= deadline:
+                        return order, best_cost
+
+            # or-opt: move a segment of 1-3 stops to another position
+            for length in (1, 2, 3):
+                for i in range(self.size - length + 1):
+                    segment = order[i:i + length]
+                    rest = order[:i] + order[i + length:]
+                    for k in range(len(rest) + 1):
+                        if k == i:
+                            continue
+                        candidate = rest[:k] + segment + rest[k:]
+                        candidate_cost = self.cost(candidate)
+                        if candidate_cost < best_cost:
+                            order, best_cost, improved = candidate, candidate_cost, True
+                            break
+                        if time.monotonic() >= deadline:
+                            return order, best_cost
+        return order, best_cost
+
+    def optimize(self, initial_order: Optional[List[int]] = None,
+                 deadline: Optional[float] = None) -> List[int]:
+        """Best order found before the deadline; never worse than initial_order"""
+        if deadline is None:
+            deadline = float("inf")
+        best_order = list(initial_order) if initial_order is not None else list(range(self.size))
+        best_cost = self.cost(best_order)
+        if self.size < 2:
+            return best_order
+
+        # Seed from each start stop, earliest opening first, while time allows
+        seeds = []
+        for first in sorted(range(self.size), key=lambda stop: (self.open_times[stop], stop)):
+            seeds.append(self.nearest_neighbour(first))
+            if time.monotonic() >= deadline:
+                break
+        seeds.sort(key=self.cost)
+        if self.cost(seeds[0]) < best_cost:
+            best_order, best_cost = seeds[0], self.cost(seeds[0])
+        for seed in seeds:
+            if time.monotonic() >= deadline:
+                break
+            order, order_cost = self.improve(seed, deadline)
+            if order_cost < best_cost:
+                best_order, best_cost = order, order_cost
+        return best_order
+
+
+class CityDistanceMatrix:
+    """Distance and travel-time matrices for one city, keyed by attraction id"""
+    def __init__(self, ids: List[str], distances: np.ndarray, travel_minutes: np.ndarray):
+        self.ids = ids
+        self.index = {attraction_id: i for i, attraction_id in enumerate(ids)}
+        self.distances = distances
+        self.travel_minutes = travel_minutes
+
+    def submatrices(self, attraction_ids: List[str]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(km, travel minutes) between the given attractions, or None if any is missing"""
+        try:
+            positions = [self.index[attraction_id] for attraction_id in attraction_ids]
+        except KeyError:
+            return None
+        grid = np.ix_(positions, positions)
+        return self.distances[grid].astype(float), self.travel_minutes[grid].astype(int)
+
+
+class DistanceMatrixStore:
+    """
+    Per-city attraction distance matrices precomputed offline and shared via mmap
+
+    Each city is stored as <city>_distances.npy (float32 km), <city>_travel.npy
+    (int16 minutes), <city>_coords.npy and <city>_ids.json, where row i of
+    every array belongs to ids[i]. Builds only append rows, and the id list
+    is replaced last, so a reader that loads ids first always sees matrices
+    at least as large as its id list. Workers map the files read-only, so the
+    OS page cache holds one copy however many processes use them.
+    """
+    def __init__(self, matrix_dir: str):
+        self.matrix_dir = matrix_dir
+        self._loaded = {}  # city -> (ids file mtime, CityDistanceMatrix)
+        os.makedirs(matrix_dir, exist_ok=True)
+
+    def _path(self, city: str, kind: str) -> str:
+        extension = "json" if kind == "ids" else "npy"
+        return os.path.join(self.matrix_dir, f"{city}_{kind}.{extension}")
+
+    def _replace(self, path: str, write):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    def load(self, city: str) -> Optional[CityDistanceMatrix]:
+        """Memory-map the city's matrices, reloading only after a rebuild"""
+        ids_path = self._path(city, "ids")
+        try:
+            mtime = os.stat(ids_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        cached = self._loaded.get(city)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        with open(ids_path) as f:
+            ids = json.load(f)
+        distances = np.load(self._path(city, "distances"), mmap_mode="r")
+        travel_minutes = np.load(self._path(city, "travel"), mmap_mode="r")
+        if distances.shape[0] < len(ids):
+            return None  # a concurrent build is mid-write
+
+        matrix = CityDistanceMatrix(ids, distances, travel_minutes)
+        self._loaded[city] = (mtime, matrix)
+        return matrix
+
+    def build(self, city: str, ids: List[str], latitudes: Sequence[float],
+              longitudes: Sequence[float]) -> int:
+        """
+        Add any attractions missing from the city's saved matrices
+
+        Existing rows are copied as-is and only the new rows and columns are
+        computed. Removed attractions keep their rows. Returns the number of
+        attractions added.
+        """
+        existing = self.load(city)
+        if existing:
+            known_ids = list(existing.ids)
+            known_count = len(known_ids)
+            coords = np.load(self._path(city, "coords"))[:known_count]
+        else:
+            known_ids, known_count = [], 0
+            coords = np.empty((0, 2))
+
+        new = [(i, lat, lon) for i, lat, lon in zip(ids, latitudes, longitudes)
+               if existing is None or i not in existing.index]
+        if not new:
+            return 0
+
+        all_ids = known_ids + [i for i, _, _ in new]
+        new_coords = np.array([(lat, lon) for _, lat, lon in new], dtype=float)
+        all_coords = np.vstack([coords, new_coords])
+
+        size = len(all_ids)
+        distances = np.empty((size, size), dtype=np.float32)
+        travel_minutes = np.empty((size, size), dtype=np.int16)
+        if existing:
+            distances[:known_count, :known_count] = existing.distances[:known_count, :known_count]
+            travel_minutes[:known_count, :known_count] = existing.travel_minutes[:known_count, :known_count]
+
+        # New rows against every point; the matrix is symmetric, so mirror them
+        new_rows = haversine_distances(new_coords[:, 0], new_coords[:, 1], all_coords[:, 0], all_coords[:, 1])
+        new_travel = np.ceil(new_rows / CITY_SPEED_KMH * 60).astype(int) + TRAVEL_BUFFER_MIN
+        new_travel[np.arange(len(new)), known_count + np.arange(len(new))] = 0
+        distances[known_count:, :] = new_rows
+        distances[:, known_count:] = new_rows.T
+        travel_minutes[known_count:, :] = new_travel
+        travel_minutes[:, known_count:] = new_travel.T
+
+        # Matrices before ids, so readers never see ids without their rows
+        self._replace(self._path(city, "distances"), lambda f: np.save(f, distances))
+        self._replace(self._path(city, "travel"), lambda f: np.save(f, travel_minutes))
+        self._replace(self._path(city, "coords"), lambda f: np.save(f, all_coords))
+        self._replace(self._path(city, "ids"), lambda f: f.write(json.dumps(all_ids).encode()))
+        return len(new)
+
+
+# Offline build: python routing.py <matrix_dir> [mongo_uri]
+if __name__ == "__main__":
+    import sys
+    from toristspots import ItineraryGenerator
+
+    if len(sys.argv) < 2:
+        print("Usage: python routing.py <matrix_dir> [mongo_uri]")
+        sys.exit(1)
+
+    mongo_uri = sys.argv[2] if len(sys.argv) > 2 else "mongodb://localhost:27017/touristattractions"
+    generator = ItineraryGenerator(mongo_uri, matrix_dir=sys.argv[1])
+    for city, count in generator.update_distance_matrices().items():
+        print(f"{city}: added {count} attractions")
@@ -0,0 +1,296 @@
+# synthetic_data.py
+"""
+Vectorized, seedable synthetic data for load tests and benchmarks.
+
+Generates trips (in the simulate_user_data shape), attraction catalogs and
+hotel tables a whole column at a time, and writes them as Parquet, CSV or
+NPY shards:
+    python synthetic_data.py data/ --trips 1000000 --attractions 5000 --hotels 20000
+    python synthetic_data.py data/ --trips 1000000 --format npy    # prepared feature matrices
+
+The same seed and shard size always produce the same files. Each shard has
+its own random stream, so shards can also be generated independently.
+"""
+import argparse
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from budget import MISC_CATEGORIES
+
+# Traveler type -> (share of trips, initial budget range, accommodation and
+# attractions shares of the budget, food and transport spend per day,
+# {food preference: probability}, {transport type: probability}).
+# Mirrors simulate_user_data.
+TRAVELER_TYPES = {
+    'budget': (0.3, (10000, 30000), (0.2, 0.4), (0.1, 0.2), (200, 500), (50, 200),
+               {1: 1.0}, {1: 1.0}),
+    'mid-range': (0.4, (25000, 60000), (0.3, 0.5), (0.15, 0.25), (500, 1000), (200, 500),
+                  {2: 1.0}, {1: 0.3, 2: 0.4, 3: 0.3}),
+    'luxury': (0.1, (50000, 150000), (0.4, 0.6), (0.2, 0.3), (1000, 3000), (1000, 3000),
+               {3: 1.0}, {4: 1.0}),
+    'experience': (0.1, (30000, 80000), (0.2, 0.3), (0.3, 0.5), (300, 800), (100, 300),
+                   {1: 0.6, 2: 0.4}, {1: 0.7, 2: 0.3}),
+    'comfort': (0.1, (40000, 90000), (0.4, 0.6), (0.1, 0.2), (800, 1500), (500, 1500),
+                {2: 0.7, 3: 0.3}, {2: 0.4, 3: 0.4, 4: 0.2}),
+}
+
+# Upper bound of each miscellaneous category as a share of the initial budget
+MISC_SHARES = {'shopping': 0.1, 'clubbing': 0.05, 'souvenirs': 0.03, 'emergencies': 0.07, 'others': 0.05}
+
+# City -> (latitude, longitude) centre, taken from the hotel CSVs
+CITY_CENTERS = {
+    'jaipur': (26.92, 75.82),
+    'udaipur': (24.58, 73.68),
+    'jaisalmer': (26.91, 70.92),
+}
+
+ATTRACTION_CATEGORIES = ['Fort', 'Palace', 'Museum', 'Garden', 'Temple', 'Lake', 'Market']
+ATTRACTION_TAGS = ['crowded', 'photography', 'heritage', 'nature', 'market', 'museum']
+
+# Hotel category -> (share of hotels, budget_min_INR range)
+HOTEL_CATEGORIES = {
+    'Hostel': (0.2, (300, 1200)),
+    'Budget': (0.25, (700, 2500)),
+    'Mid-range': (0.2, (2000, 6000)),
+    'Heritage': (0.15, (3000, 10000)),
+    '4 Star': (0.1, (5000, 12000)),
+    'Luxury': (0.07, (10000, 25000)),
+    'Ultra-Luxury': (0.03, (25000, 60000)),
+}
+# Amenity -> (probability for the cheapest category, for the most expensive)
+HOTEL_AMENITIES = {
+    'pool': (0.05, 0.95), 'wifi': (0.95, 1.0), 'breakfast_included': (0.8, 1.0),
+    'parking': (0.5, 1.0), 'ac': (0.4, 1.0), 'pet_friendly': (0.2, 0.4),
+    'gym': (0.02, 0.9), 'spa': (0.05, 0.95), 'restaurant': (0.6, 1.0),
+    'front_desk_24h': (0.9, 1.0), 'family_friendly': (0.9, 1.0), 'bar': (0.1, 0.95),
+    'laundry_service': (0.1, 0.8), 'room_service': (0.05, 0.95),
+    'accessible_rooms': (0.7, 1.0), 'non_smoking_rooms': (0.95, 1.0),
+}
+
+
+def _rng(seed, shard=0, city=None):
+    """Random stream of one shard; per-city data also mixes in a stable hash of the city"""
+    key = [seed, shard] if city is None else [seed, shard, zlib.crc32(city.encode('utf-8'))]
+    return np.random.default_rng(key)
+
+
+def _pick(rng, choices, n):
+    """n draws from {value: probability}"""
+    values = list(choices)
+    probabilities = np.array(list(choices.values()), dtype=float)
+    return np.asarray(values)[rng.choice(len(values), size=n, p=probabilities / probabilities.sum())]
+
+
+def _per_type(rng, types, column):
+    """Draw one column for every trip using each trip's traveler type parameters"""
+    out = np.empty(len(types))
+    for code, params in enumerate(TRAVELER_TYPES.values()):
+        rows = np.flatnonzero(types == code)
+        if not len(rows):
+            continue
+        spec = params[column]
+        if isinstance(spec, dict):
+            out[rows] = _pick(rng, spec, len(rows))
+        elif column == 1 or column >= 4:
+            out[rows] = rng.integers(spec[0], spec[1], size=len(rows))  # whole rupees, like randint
+        else:
+            out[rows] = rng.uniform(spec[0], spec[1], size=len(rows))
+    return out
+
+
+def generate_trips(num_trips, seed=0, shard=0, mixture=None, first_user_id=1):
+    """
+    Trips shaped like simulate_user_data, as a DataFrame
+
+    mixture overrides the traveler type shares, e.g. {'luxury': 0.5,
+    'budget': 0.5}. The miscellaneous breakdown comes as flat
+    miscellaneous.<category> columns, which prepare_data, Parquet and
+    iter_trip_chunks all read directly.
+    """
+    rng = _rng(seed, shard)
+    shares = mixture or {name: params[0] for name, params in TRAVELER_TYPES.items()}
+    codes = {name: code for code, name in enumerate(TRAVELER_TYPES)}
+    types = _pick(rng, {codes[name]: share for name, share in shares.items()}, num_trips)
+
+    initial_budget = _per_type(rng, types, 1)
+    accommodation = initial_budget * _per_type(rng, types, 2)
+    attractions = initial_budget * _per_type(rng, types, 3)
+    food_per_day = _per_type(rng, types, 4)
+    transport_per_day = _per_type(rng, types, 5)
+    days = rng.integers(1, 15, size=num_trips)
+
+    frame = pd.DataFrame({
+        'user_id': np.arange(first_user_id, first_user_id + num_trips),
+        'initial_budget': initial_budget.astype(np.int64),
+        'accommodation_total': accommodation,
+        'attractions_total': attractions,
+        'food_total': (food_per_day * days).astype(np.int64),
+        'transport_total': (transport_per_day * days).astype(np.int64),
+    })
+    misc_total = np.zeros(num_trips, dtype=np.int64)
+    for category in MISC_CATEGORIES:
+        # Same range as randint(0, budget * share)
+        amounts = np.floor(rng.random(num_trips) * np.maximum(initial_budget * MISC_SHARES[category], 1))
+        frame[f'miscellaneous.{category}'] = amounts.astype(np.int64)
+        misc_total += frame[f'miscellaneous.{category}'].to_numpy()
+    frame['misc_total'] = misc_total
+    frame['days'] = days
+    frame['food_preference'] = _per_type(rng, types, 6).astype(np.int64)
+    frame['transport_type'] = _per_type(rng, types, 7).astype(np.int64)
+    frame['traveler_type'] = np.asarray(list(TRAVELER_TYPES))[types]
+    return frame
+
+
+def generate_attractions(num_attractions, city='jaipur', seed=0, shard=0, first_id=0, spread=0.1):
+    """Attraction rows for one city; attraction_documents turns them into collection documents"""
+    rng = _rng(seed, shard, city)
+    center = CITY_CENTERS[city]
+    open_hour = rng.choice([6, 7, 8, 9, 10, 11, 12, 14], size=num_attractions)
+    close_hour = np.minimum(open_hour + rng.choice([4, 6, 8, 10], size=num_attractions), 23)
+    tag_mask = rng.random((num_attractions, len(ATTRACTION_TAGS))) < 0.25
+    ids = np.arange(first_id, first_id + num_attractions)
+    return pd.DataFrame({
+        'name': [f"{city.title()} Attraction {i}" for i in ids],
+        'category': rng.choice(ATTRACTION_CATEGORIES, size=num_attractions),
+        'opening_hours': [f"{o:02d}:00 – {c:02d}:30" for o, c in zip(open_hour, close_hour)],
+        'avg_visit_duration': rng.choice([30, 45, 60, 90, 120], size=num_attractions),
+        'indoor_outdoor': rng.choice(['indoor', 'outdoor'], size=num_attractions),
+        'tags': [[t for t, on in zip(ATTRACTION_TAGS, row) if on] for row in tag_mask],
+        'entry_fee_indian': rng.integers(0, 500, size=num_attractions),
+        'entry_fee_foreigner': rng.integers(100, 1500, size=num_attractions),
+        'latitude': center[0] + rng.uniform(-spread, spread, size=num_attractions),
+        'longitude': center[1] + rng.uniform(-spread, spread, size=num_attractions),
+        'address': [f"Street {i}, {city.title()}" for i in ids],
+    })
+
+
+def attraction_documents(frame):
+    """Attraction rows as documents shaped like the city collections"""
+    documents = []
+    for row in frame.itertuples(index=False):
+        documents.append({
+            'name': row.name,
+            'category': row.category,
+            'opening_hours': {'daily': row.opening_hours},
+            'avg_visit_duration': int(row.avg_visit_duration),
+            'indoor_outdoor': row.indoor_outdoor,
+            'tags': list(row.tags),
+            'entry_fee': {'indian': int(row.entry_fee_indian), 'foreigner': int(row.entry_fee_foreigner)},
+            'latitude': float(row.latitude),
+            'longitude': float(row.longitude),
+            'address': row.address,
+            'images': '',
+            'description': '',
+        })
+    return documents
+
+
+def generate_hotels(num_hotels, city='udaipur', seed=0, shard=0, first_id=0, spread=0.08):
+    """Hotel rows with the same columns as the <city>_hotels_full.csv files"""
+    rng = _rng(seed, shard, city)
+    center = CITY_CENTERS[city]
+    names = list(HOTEL_CATEGORIES)
+    tier = rng.choice(len(names), size=num_hotels, p=[share for share, _ in HOTEL_CATEGORIES.values()])
+    low = np.array([prices[0] for _, prices in HOTEL_CATEGORIES.values()])[tier]
+    high = np.array([prices[1] for _, prices in HOTEL_CATEGORIES.values()])[tier]
+    # Log-uniform prices, rounded to 50 rupees like real rate cards
+    budget_min = np.round(np.exp(rng.uniform(np.log(low), np.log(high))) / 50) * 50
+    budget_max = np.round(budget_min * rng.uniform(1.3, 3.0, size=num_hotels) / 50) * 50
+
+    ids = np.arange(first_id, first_id + num_hotels)
+    frame = pd.DataFrame({
+        'name': [f"{city.title()} Hotel {i}" for i in ids],
+        'category': np.asarray(names)[tier],
+        'budget_min_INR': budget_min.astype(np.int64),
+        'budget_max_INR': budget_max.astype(np.int64),
+        'address': [f"Street {i}, {city.title()}" for i in ids],
+        'latitude': np.round(center[0] + rng.uniform(-spread, spread, size=num_hotels), 4),
+        'longitude': np.round(center[1] + rng.uniform(-spread, spread, size=num_hotels), 4),
+    })
+    level = tier / (len(names) - 1)
+    for amenity, (cheapest, priciest) in HOTEL_AMENITIES.items():
+        has_it = rng.random(num_hotels) < cheapest + (priciest - cheapest) * level
+        frame[amenity] = np.where(has_it, 'Yes', 'No')
+    return frame
+
+
+def write_shards(out_dir, name, total, shard_size, make_shard, fmt='parquet'):
+    """
+    Write total rows as <name>-<shard>.<fmt> files of shard_size rows
+
+    make_shard(rows, shard, start) returns a DataFrame, or for fmt='npy' an
+    array, where start is the index of the shard's first row. Returns the
+    written paths in shard order.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for shard, start in enumerate(range(0, total, shard_size)):
+        data = make_shard(min(shard_size, total - start), shard, start)
+        path = os.path.join(out_dir, f"{name}-{shard:05d}.{fmt}")
+        tmp_path = f"{path}.tmp"
+        if fmt == 'parquet':
+            data.to_parquet(tmp_path, index=False)
+        elif fmt == 'csv':
+            data.to_csv(tmp_path, index=False)
+        elif fmt == 'npy':
+            with open(tmp_path, 'wb') as f:
+                np.save(f, data)
+        else:
+            raise ValueError(f"Unsupported shard format: {fmt}")
+        os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
+
+
+def write_trip_shards(out_dir, num_trips, shard_size=100000, seed=0, fmt='parquet', mixture=None):
+    """
+    Trip shards for iter_trip_chunks / fit_streaming
+
+    fmt='npy' stores prepared float32 feature matrices instead of raw trips.
+    """
+    from budget import TravelBudgetPredictor
+    predictor = TravelBudgetPredictor() if fmt == 'npy' else None
+
+    def make_shard(rows, shard, start):
+        frame = generate_trips(rows, seed, shard, mixture, first_user_id=start + 1)
+        return predictor.prepare_frame(frame) if predictor else frame
+
+    return write_shards(out_dir, 'trips', num_trips, shard_size, make_shard, fmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic trips, attractions and hotels as shards")
+    parser.add_argument('out_dir')
+    parser.add_argument('--trips', type=int, default=0)
+    parser.add_argument('--attractions', type=int, default=0, help="per city")
+    parser.add_argument('--hotels', type=int, default=0, help="per city")
+    parser.add_argument('--cities', default=','.join(CITY_CENTERS))
+    parser.add_argument('--shard-size', type=int, default=100000)
+    parser.add_argument('--format', choices=['parquet', 'csv', 'npy'], default='parquet',
+                        help="npy writes trips as prepared feature matrices")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.trips:
+        paths = write_trip_shards(os.path.join(args.out_dir, 'trips'), args.trips,
+                                  args.shard_size, args.seed, args.format)
+        print(f"trips: {args.trips} rows in {len(paths)} shard(s)")
+
+    table_format = 'parquet' if args.format == 'npy' else args.format
+    for city in args.cities.split(','):
+        for kind, count, generate in [('attractions', args.attractions, generate_attractions),
+                                      ('hotels', args.hotels, generate_hotels)]:
+            if not count:
+                continue
+            paths = write_shards(
+                os.path.join(args.out_dir, kind), city, count, args.shard_size,
+                lambda rows, shard, start: generate(rows, city, args.seed, shard, start), table_format
+            )
+            print(f"{kind} ({city}): {count} rows in {len(paths)} shard(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# test_itinerary_writer.py
+"""
+ItineraryWriter against an in-memory mongomock collection.
+
+    python -m pytest test_itinerary_writer.py
+"""
+import mongomock
+import pytest
+from bson.errors import InvalidDocument
+from pymongo.errors import WriteError
+
+from toristspots import ItineraryGenerator, ItineraryWriter
+
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient()["touristattractions"]["itineraries"]
+
+
+def make_writer(collection, **kwargs):
+    kwargs.setdefault("batch_size", 100)
+    kwargs.setdefault("flush_interval", 0.05)
+    return ItineraryWriter(collection, **kwargs)
+
+
+def test_writes_every_submitted_itinerary(collection):
+    writer = make_writer(collection, batch_size=7)
+    ids = [writer.submit({"city": "jaipur", "n": n}) for n in range(20)]
+    writer.flush()
+    assert writer.inserted == 20
+    assert writer.errors == []
+    assert sorted(doc["n"] for doc in collection.find()) == list(range(20))
+    assert {doc["_id"] for doc in collection.find()} == set(ids)
+    writer.close()
+
+
+def test_unencodable_itinerary_is_rejected_on_submit(collection):
+    writer = make_writer(collection)
+    for n in range(5):
+        writer.submit({"n": n})
+    with pytest.raises(InvalidDocument):
+        writer.submit({"n": 5, "bad": {1, 2}})
+    for n in range(6, 11):
+        writer.submit({"n": n})
+    writer.flush()
+    assert writer.inserted == 10
+    assert writer.errors == []
+    assert collection.count_documents({}) == 10
+    assert writer._thread.is_alive()
+    writer.close()
+
+
+def test_unexpected_batch_error_is_retried_one_by_one(collection, monkeypatch):
+    writer = make_writer(collection)
+    good = [{"n": n} for n in range(5)]
+    bad = {"n": 5}
+    ids = [writer.submit(doc) for doc in good]
+    bad_id = writer.submit(bad)
+
+    insert_one = collection.insert_one
+
+    def insert_many(docs, ordered=False):
+        # Store part of the batch, then fail the way a client-side error would
+        for doc in docs[:2]:
+            insert_one(doc)
+        raise ValueError("cannot encode")
+
+    def flaky_insert_one(doc, *args, **kwargs):
+        if doc["_id"] == bad_id:
+            raise ValueError("cannot encode this one")
+        return insert_one(doc, *args, **kwargs)
+
+    monkeypatch.setattr(collection, "insert_many", insert_many)
+    monkeypatch.setattr(collection, "insert_one", flaky_insert_one)
+    writer.flush()
+
+    assert writer.inserted == 5
+    assert [error["_id"] for error in writer.errors] == [bad_id]
+    assert {doc["_id"] for doc in collection.find()} == set(ids)
+    writer.close()
+
+
+def test_duplicate_key_is_reported_for_that_document_only(collection):
+    writer = make_writer(collection)
+    existing = collection.insert_one({"n": 0}).inserted_id
+    writer.submit({"n": 1})
+    writer.submit({"_id": existing, "n": 2})
+    writer.submit({"n": 3})
+    writer.flush()
+    assert writer.inserted == 2
+    assert [error["_id"] for error in writer.errors] == [existing]
+    assert writer.errors[0]["code"] == 11000
+    assert writer.error_for(existing) is writer.errors[0]
+    writer.close()
+
+
+def test_on_error_callback_failure_keeps_writer_running(collection):
+    def on_error(doc, error):
+        raise RuntimeError("callback failed")
+
+    writer = make_writer(collection, on_error=on_error)
+    existing = collection.insert_one({"n": 0}).inserted_id
+    writer.submit({"_id": existing})
+    writer.flush()
+    writer.submit({"n": 1})
+    writer.flush()
+    assert writer._thread.is_alive()
+    assert writer.inserted == 1
+    writer.close()
+
+
+def test_flush_and_submit_raise_once_the_thread_has_stopped(collection):
+    writer = make_writer(collection, max_pending=1)
+    writer._queue.put(writer._STOP)
+    writer._thread.join()
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    writer._queue.put({"n": 0})  # fill the queue nobody drains
+    with pytest.raises(RuntimeError):
+        writer.submit({"n": 1})
+    writer.close()  # must not hang
+
+
+def test_save_itinerary_to_db_raises_for_its_failed_write(collection):
+    generator = ItineraryGenerator(client=collection.database.client)
+    itinerary_id = generator.save_itinerary_to_db({"city": "jaipur"}, wait=True)
+    assert collection.find_one({"_id": itinerary_id})["city"] == "jaipur"
+    with pytest.raises(WriteError):
+        generator.save_itinerary_to_db({"_id": itinerary_id, "city": "udaipur"}, wait=True)
+    generator.get_itinerary_writer().close()
@@ -1,16 +1,428 @@
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError, WriteError
+import bson
+from bson import ObjectId
 from datetime import datetime, timedelta
 import random
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 import math
 from collections import defaultdict
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.preprocessing import LabelEncoder
+import atexit
+import heapq
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
 import numpy as np
 
+from lazy_imports import lazy_import
+from model_store import ModelArtifactStore
+from routing import DayRouteOptimizer, DistanceMatrixStore, haversine_matrix, travel_minutes_matrix
+
+# sklearn is only needed to train a model or load a saved one
+DecisionTreeClassifier = lazy_import("sklearn.tree", "DecisionTreeClassifier")
+LabelEncoder = lazy_import("sklearn.preprocessing", "LabelEncoder")
+
+# Hours covered by the compiled suitability lookup table
+TABLE_HOURS = 24
+
+# Scheduling day window, in minutes since midnight
+DAY_START = 9 * 60
+DAY_END = 18 * 60
+
+def parse_opening_hours(opening_hours_str: str) -> Dict[str, str]:
+    """Parse opening hours string into open/close times"""
+    if not opening_hours_str:
+        return {"open": "09:00", "close": "18:00"}
+    
+    parts = opening_hours_str.split('–')  # Note: This is an en dash, not hyphen
+    if len(parts) != 2:
+        return {"open": "09:00", "close": "18:00"}
+        
+    return {"open": parts[0].strip(), "close": parts[1].strip()}
+
+def time_to_minutes(time_str: str) -> int:
+    """Convert HH:MM time string to minutes since midnight"""
+    try:
+        hours, minutes = map(int, time_str.split(':'))
+        return hours * 60 + minutes
+    except:
+        return 540  # Default to 9:00 AM if parsing fails
+
+class AttractionRecord:
+    """
+    Attraction fields parsed once at catalog load for the scheduling loops
+    
+    Opening hours are stored as minutes since midnight and tags as bits from
+    the owning catalog's tag_bit(), so the scheduler never re-parses strings.
+    The source document is kept for the display-only fields.
+    """
+    __slots__ = ("id", "id_str", "open_time", "close_time", "open_hour", "duration",
+                 "fee_indian", "fee_foreigner", "latitude", "longitude", "indoor",
+                 "tag_bits", "doc")
+    
+    def __init__(self, doc: Dict, tag_bits: Dict[str, int]):
+        opening_hours = parse_opening_hours(doc.get("opening_hours", {}).get("daily", ""))
+        entry_fee = doc.get("entry_fee", {})
+        setting = doc.get("indoor_outdoor", "")
+        tags = doc.get("tags", [])
+        
+        self.id = doc["_id"]
+        self.id_str = str(doc["_id"])
+        self.open_time = time_to_minutes(opening_hours["open"])
+        self.close_time = time_to_minutes(opening_hours["close"])
+        self.open_hour = self.open_time // 60
+        self.duration = doc.get("avg_visit_duration", 60)
+        self.fee_indian = entry_fee.get("indian", 0)
+        self.fee_foreigner = entry_fee.get("foreigner", 0)
+        self.latitude = doc.get("latitude")
+        self.longitude = doc.get("longitude")
+        self.indoor = isinstance(setting, str) and setting.lower() == "indoor"
+        self.tag_bits = 0
+        for tag in (tags if isinstance(tags, list) else [tags]):
+            self.tag_bits |= tag_bits.setdefault(tag, 1 << len(tag_bits))
+        self.doc = doc
+
+class AttractionCatalog:
+    """
+    In-memory snapshot of one city's attractions with prebuilt filter indexes
+    
+    Filters are answered from boolean masks over the snapshot instead of a
+    MongoDB query. The snapshot is reloaded once it is older than ttl seconds
+    or after invalidate(), which a change stream watcher calls on every write.
+    Returned documents are shared between requests and must not be mutated.
+    """
+    def __init__(self, collection, ttl: float = 300.0):
+        self.collection = collection
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # invalidate() bumps the generation; a snapshot is current while it
+        # was loaded from the latest generation and is younger than ttl
+        self._generation = 0
+        self._loaded_generation = -1
+        self._loaded_at = 0.0
+        # (documents, records, records by id, tag bits, tag index, indoor mask),
+        # swapped as one tuple on refresh
+        self._snapshot = ([], [], {}, {}, {}, np.zeros(0, dtype=bool))
+        self._watch_stop = threading.Event()
+        
+    def refresh(self, force: bool = True):
+        """
+        Reload the city's attractions and rebuild the filter indexes
+        
+        With force=False the reload is skipped when another thread already
+        refreshed the snapshot while this one waited for the lock.
+        """
+        with self._lock:
+            if not force and not self._is_stale():
+                return
+            # Taken before the query, so an invalidate() during it is kept
+            generation = self._generation
+            documents = list(self.collection.find({}))
+            tag_bits = {}
+            records = [AttractionRecord(doc, tag_bits) for doc in documents]
+            
+            tag_index = defaultdict(lambda: np.zeros(len(documents), dtype=bool))
+            indoor_mask = np.zeros(len(documents), dtype=bool)
+            for i, doc in enumerate(documents):
+                tags = doc.get("tags", [])
+                for tag in (tags if isinstance(tags, list) else [tags]):
+                    tag_index[tag][i] = True
+                # Same exact, case-sensitive match the MongoDB query used
+                setting = doc.get("indoor_outdoor")
+                indoor_mask[i] = "indoor" in setting if isinstance(setting, list) else setting == "indoor"
+                
+            records_by_id = {record.id_str: record for record in records}
+            self._snapshot = (documents, records, records_by_id, tag_bits, dict(tag_index), indoor_mask)
+            self._loaded_at = time.monotonic()
+            self._loaded_generation = generation
+            
+    def invalidate(self):
+        self._generation += 1
+        
+    def _is_stale(self) -> bool:
+        return (self._loaded_generation != self._generation
+                or time.monotonic() - self._loaded_at > self.ttl)
+        
+    def _current(self):
+        if self._is_stale():
+            self.refresh(force=False)
+        return self._snapshot
+        
+    def _matches(self, snapshot, filters: Optional[Dict]) -> np.ndarray:
+        """Positions of attractions matching the avoid_crowd/indoor_only/photography_only filters"""
+        documents, _, _, _, tag_index, indoor_mask = snapshot
+        no_tag = np.zeros(len(documents), dtype=bool)
+        mask = np.ones(len(documents), dtype=bool)
+        
+        if filters:
+            # photography_only replaces avoid_crowd, as both used to set query["tags"]
+            if filters.get("photography_only"):
+                mask &= tag_index.get("photography", no_tag)
+            elif filters.get("avoid_crowd"):
+                mask &= ~tag_index.get("crowded", no_tag)
+            if filters.get("indoor_only"):
+                mask &= indoor_mask
+                
+        return np.flatnonzero(mask)
+        
+    def find(self, filters: Optional[Dict] = None) -> List[Dict]:
+        """Return attraction documents matching the filters"""
+        snapshot = self._current()
+        documents = snapshot[0]
+        return [documents[i] for i in self._matches(snapshot, filters)]
+        
+    def find_records(self, filters: Optional[Dict] = None) -> List[AttractionRecord]:
+        """Return pre-parsed attraction records matching the filters"""
+        return self.find_records_with_tags(filters)[0]
+        
+    def find_records_with_tags(self, filters: Optional[Dict] = None) -> Tuple[List[AttractionRecord], Dict[str, int]]:
+        """
+        Records matching the filters and the tag -> bit map, from one snapshot
+        
+        Tag bits are assigned per refresh, so a record's tag_bits must only be
+        tested against bits of the snapshot it came from.
+        """
+        snapshot = self._current()
+        records = snapshot[1]
+        return [records[i] for i in self._matches(snapshot, filters)], snapshot[3]
+        
+    def get_record(self, attraction_id: str) -> Optional[AttractionRecord]:
+        return self._current()[2].get(attraction_id)
+        
+    def tag_bit(self, tag: str) -> int:
+        """
+        Bit used for a tag in AttractionRecord.tag_bits (0 if no attraction has it)
+        
+        Only valid for records of the current snapshot; use
+        find_records_with_tags to get records and bits together.
+        """
+        return self._current()[3].get(tag, 0)
+        
+    def watch(self) -> threading.Thread:
+        """
+        Invalidate the snapshot on every change to the collection
+        
+        Change streams need a replica set; on a standalone server the watcher
+        exits and the catalog keeps refreshing on its TTL.
+        """
+        def listen():
+            try:
+                with self.collection.watch() as stream:
+                    while not self._watch_stop.is_set():
+                        if stream.try_next() is not None:
+                            self.invalidate()
+            except Exception as e:
+                print(f"Change stream unavailable for {self.collection.name}, using TTL refresh: {e}")
+                
+        self._watch_stop.clear()
+        watcher = threading.Thread(target=listen, name=f"catalog-{self.collection.name}", daemon=True)
+        watcher.start()
+        return watcher
+        
+    def stop_watching(self):
+        self._watch_stop.set()
+
+class ItineraryWriter:
+    """
+    Write-behind buffer that persists itineraries with unordered insert_many
+    
+    A background thread flushes once batch_size itineraries are buffered or
+    flush_interval seconds have passed. At most max_pending itineraries can
+    wait, so submit() blocks (backpressure) when MongoDB falls behind.
+    Failed documents are recorded in errors and passed to on_error. The
+    buffer is flushed by close(), which also runs at interpreter exit.
+    """
+    # Control messages sent through the queue alongside itineraries
+    _FLUSH = object()
+    _STOP = object()
+    # How often blocked submit()/flush() calls check that the writer thread is alive
+    _POLL_INTERVAL = 0.1
+    
+    def __init__(self, collection, batch_size: int = 100, flush_interval: float = 1.0,
+                 max_pending: int = 1000, on_error=None):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_error = on_error
+        self.inserted = 0
+        self.errors = []
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"writer-{collection.name}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        
+    def submit(self, itinerary: Dict, timeout: Optional[float] = None):
+        """
+        Queue an itinerary and return the _id it will be stored under
+        
+        Blocks while the buffer is full; raises queue.Full if timeout expires
+        and RuntimeError if the writer thread has died. An itinerary BSON
+        cannot encode raises bson.errors.InvalidDocument here, as insert_one
+        would, instead of failing the batch it would have been written with.
+        """
+        if self._closed:
+            raise RuntimeError("ItineraryWriter is closed")
+        itinerary.setdefault("_id", ObjectId())
+        bson.encode(itinerary)
+        self._put(itinerary, timeout)
+        return itinerary["_id"]
+        
+    def flush(self):
+        """
+        Block until everything submitted so far has been written
+        
+        Raises RuntimeError if the writer thread dies before that.
+        """
+        self._put(self._FLUSH)
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                self._check_alive()
+                self._queue.all_tasks_done.wait(self._POLL_INTERVAL)
+                
+    def _check_alive(self):
+        if not self._thread.is_alive():
+            raise RuntimeError(f"ItineraryWriter thread for {self.collection.name} has stopped")
+            
+    def _put(self, item, timeout: Optional[float] = None):
+        """queue.put that gives up with RuntimeError once the writer thread is gone"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self._check_alive()
+            wait = self._POLL_INTERVAL if deadline is None else min(self._POLL_INTERVAL, deadline - time.monotonic())
+            try:
+                self._queue.put(item, timeout=max(0.0, wait))
+                return
+            except queue.Full:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+        
+    def close(self):
+        """Flush the buffer and stop the background thread"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._put(self._STOP)
+        except RuntimeError:
+            pass  # the thread is already gone; nothing left to stop
+        self._thread.join()
+        
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None  # flush interval elapsed
+                
+            control = item is None or item is self._FLUSH or item is self._STOP
+            if not control:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                    
+            if batch and (control or len(batch) >= self.batch_size):
+                try:
+                    self._write(batch)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+                    batch = []
+                    deadline = None
+                
+            if item is self._FLUSH or item is self._STOP:
+                self._queue.task_done()
+            if item is self._STOP:
+                return
+                
+    def error_for(self, itinerary_id) -> Optional[Dict]:
+        """The recorded error of an itinerary, or None if it has not failed"""
+        for error in reversed(self.errors):
+            if error["_id"] == itinerary_id:
+                return error
+        return None
+        
+    def _write(self, batch: List[Dict]):
+        try:
+            result = self.collection.insert_many(batch, ordered=False)
+            self.inserted += len(result.inserted_ids)
+            return
+        except BulkWriteError as e:
+            self.inserted += e.details.get("nInserted", 0)
+            failures = [(batch[err["index"]], err.get("code"), err.get("errmsg", ""))
+                        for err in e.details.get("writeErrors", [])]
+        except PyMongoError as e:
+            # The server or connection failed; nothing says which documents made it
+            failures = [(doc, None, str(e)) for doc in batch]
+        except Exception as e:
+            # Not a server error, so it is about one document; find it by
+            # writing the batch one document at a time
+            print(f"Error saving {len(batch)} itineraries, retrying one by one: {e}")
+            failures = self._write_each(batch)
+            
+        self._record(failures)
+        
+    def _write_each(self, batch: List[Dict]) -> List[Tuple[Dict, Optional[int], str]]:
+        failures = []
+        for doc in batch:
+            try:
+                self.collection.insert_one(doc)
+                self.inserted += 1
+            except DuplicateKeyError as e:
+                # The failed insert_many may have stored it before giving up
+                if self.collection.find_one({"_id": doc["_id"]}, {"_id": 1}) is not None:
+                    self.inserted += 1
+                else:
+                    failures.append((doc, e.code, str(e)))
+            except Exception as e:
+                failures.append((doc, getattr(e, "code", None), str(e)))
+        return failures
+        
+    def _record(self, failures):
+        for doc, code, message in failures:
+            error = {"_id": doc["_id"], "code": code, "message": message}
+            self.errors.append(error)
+            print(f"Error saving itinerary {doc['_id']}: {message}")
+            if self.on_error:
+                try:
+                    self.on_error(doc, error)
+                except Exception as e:
+                    print(f"Error in on_error callback for itinerary {doc['_id']}: {e}")
+
+# Generator of the batch a pool worker serves, set by _init_batch_worker.
+# Initializer arguments are inherited through fork, never pickled.
+_batch_generator = None
+
+def _init_batch_worker(generator):
+    global _batch_generator
+    _batch_generator = generator
+    # Serve the inherited catalog snapshots for the whole batch instead of
+    # refreshing them over a MongoClient that was opened before the fork
+    for catalog in generator.catalogs.values():
+        catalog.ttl = float("inf")
+
+def _generate_batch_item(item, generator=None):
+    index, request, optimize = item
+    generator = generator or _batch_generator
+    try:
+        itinerary = generator.generate_itinerary(**request)
+        if optimize:
+            itinerary = generator.optimize_itinerary(itinerary)
+        return {"index": index, "itinerary": itinerary, "error": None}
+    except Exception as e:
+        return {"index": index, "itinerary": None, "error": str(e)}
+
 class ItineraryGenerator:
-    def __init__(self, mongo_uri: str = "mongodb://localhost:27017/touristattractions"):
-        self.client = MongoClient(mongo_uri)
+    def __init__(self, mongo_uri: str = "mongodb://localhost:27017/touristattractions",
+                 model_dir: Optional[str] = None, client: Optional[MongoClient] = None,
+                 catalog_ttl: float = 300.0, matrix_dir: Optional[str] = None):
+        self.client = client or MongoClient(mongo_uri)
         self.db = self.client["touristattractions"]
         self.city_collections = {
             "jaipur": self.db["jaipur"],
@@ -18,11 +430,40 @@ class ItineraryGenerator:
             "udaipur": self.db["udaipur"]
         }
         
-        # Initialize decision tree classifier
-        self.decision_tree = DecisionTreeClassifier(random_state=42)
+        # Per-city attraction catalogs served from memory
+        self.catalogs = {
+            city: AttractionCatalog(collection, ttl=catalog_ttl)
+            for city, collection in self.city_collections.items()
+        }
+        
+        # Write-behind itinerary writers, one per collection
+        self.itinerary_writers = {}
+        self._writers_lock = threading.Lock()
+        
+        # Precomputed per-city distance matrices (see update_distance_matrices)
+        matrix_dir = matrix_dir or os.getenv("ITINERARY_MATRIX_DIR")
+        self.distance_matrices = DistanceMatrixStore(matrix_dir) if matrix_dir else None
+        
+        # Decision tree classifier, created by train_decision_tree or load_model
+        self.decision_tree = None
         self.label_encoders = {}
         self.is_trained = False
         
+        # Suitability scores indexed by [weather, hour, indoor, outdoor, crowded].
+        # The request path reads (table, weather index) as one tuple so a model
+        # swap can never pair a table with another version's weather labels.
+        self.suitability_table = None
+        self._scoring_state = (None, {})
+        
+        # Persisted model versions; workers load the latest one at startup
+        model_dir = model_dir or os.getenv("ITINERARY_MODEL_DIR")
+        self.model_store = ModelArtifactStore(model_dir) if model_dir else None
+        self.model_version = None
+        self.model_ready = threading.Event()
+        self._watch_stop = threading.Event()
+        if self.model_store:
+            self.load_model()
+        
     def train_decision_tree(self, training_data: List[Dict]):
         """
         Train the decision tree classifier with historical data
@@ -66,10 +507,105 @@ class ItineraryGenerator:
             X.append(features)
             y.append(sample['success_score'])
         
+        # Scores are continuous values, so encode them as discrete class labels
+        score_encoder = self.label_encoders.setdefault('success_score', LabelEncoder())
+        y = score_encoder.fit_transform(y)
+        
         # Train the classifier
+        self.decision_tree = DecisionTreeClassifier(random_state=42)
         self.decision_tree.fit(X, y)
         self.is_trained = True
         
+        # Rebuild the lookup table so it always reflects the current tree
+        self._compile_suitability_table(np.array(X))
+        
+        if self.model_store:
+            self.model_version = self.model_store.save({
+                'decision_tree': self.decision_tree,
+                'label_encoders': self.label_encoders,
+                'suitability_table': self.suitability_table,
+                'trained_at': datetime.now().isoformat()
+            })
+        self.model_ready.set()
+        
+    def load_model(self, version: Optional[int] = None) -> int:
+        """
+        Load a persisted model version (latest by default) into this generator
+        
+        If the store is still empty, the model is trained once and published
+        so every other worker can load it instead of training again.
+        """
+        loaded = self.model_store.load(version)
+        if loaded is None:
+            self.train_decision_tree(None)
+            return self.model_version
+            
+        version, artifact = loaded
+        table = artifact['suitability_table']
+        weather_classes = artifact['label_encoders']['weather'].classes_
+        self.decision_tree = artifact['decision_tree']
+        self.label_encoders = artifact['label_encoders']
+        self.suitability_table = table
+        self._scoring_state = (table, {weather: i for i, weather in enumerate(weather_classes)})
+        self.model_version = version
+        self.is_trained = True
+        self.model_ready.set()
+        return version
+        
+    def reload_model(self) -> bool:
+        """Swap in the latest published version if it differs from the loaded one"""
+        latest = self.model_store.latest_version()
+        if latest is None or latest == self.model_version:
+            return False
+        self.load_model(latest)
+        return True
+        
+    def watch_model(self, interval: float = 30.0) -> threading.Thread:
+        """Poll the store in a background thread and hot-swap new versions"""
+        def poll():
+            while not self._watch_stop.wait(interval):
+                try:
+                    if self.reload_model():
+                        print(f"Loaded itinerary model version {self.model_version}")
+                except Exception as e:
+                    print(f"Error reloading itinerary model: {e}")
+                    
+        self._watch_stop.clear()
+        watcher = threading.Thread(target=poll, name="itinerary-model-watcher", daemon=True)
+        watcher.start()
+        return watcher
+        
+    def stop_watching(self):
+        self._watch_stop.set()
+        
+    def _predict_tree(self, features: np.ndarray) -> np.ndarray:
+        """Run the decision tree on encoded feature rows and decode the scores"""
+        labels = self.decision_tree.predict(features)
+        scores = self.label_encoders['success_score'].inverse_transform(labels).astype(float)
+        return np.clip(scores, 0, 1)  # Ensure scores are between 0-1
+        
+    def _compile_suitability_table(self, training_features: np.ndarray):
+        """
+        Precompute the tree's score for every weather/hour/preference combination
+        
+        The input space is tiny (weather labels x 24 hours x three flags), so the
+        whole tree fits in a dense array and scoring becomes an index lookup.
+        """
+        weather_classes = self.label_encoders['weather'].classes_
+        grid = np.array(list(itertools.product(
+            range(len(weather_classes)), range(TABLE_HOURS), (0, 1), (0, 1), (0, 1)
+        )))
+        table = self._predict_tree(grid).reshape(len(weather_classes), TABLE_HOURS, 2, 2, 2)
+        
+        # Check the table agrees with the tree on the rows it was trained on
+        in_range = (training_features[:, 1] >= 0) & (training_features[:, 1] < TABLE_HOURS)
+        rows = training_features[in_range].astype(np.intp)
+        if not np.array_equal(table[tuple(rows.T)], self._predict_tree(rows)):
+            raise RuntimeError("Compiled suitability table disagrees with the decision tree")
+        
+        self.suitability_table = table
+        self._scoring_state = (table, {weather: i for i, weather in enumerate(weather_classes)})
+        
     def _create_sample_training_data(self):
         """Create sample training data for demonstration"""
         sample_data = []
@@ -109,65 +645,94 @@ class ItineraryGenerator:
         Returns:
             Score between 0-1 indicating suitability (1 = highly suitable)
         """
+        scores = self.predict_suitability_batch([weather], [hour], preferences)
+        return scores[0]
+
+    def predict_suitability_batch(self, weathers: List[str], hours: List[int],
+                                  preferences: Dict[str, bool]) -> np.ndarray:
+        """
+        Vectorized counterpart of predict_attraction_suitability
+
+        Scores are read from the compiled suitability table; hours outside
+        the table fall back to the decision tree.
+
+        Returns:
+            Array of scores between 0-1, one per input pair
+        """
         if not self.is_trained:
             # Train with sample data if not already trained
             self.train_decision_tree(None)
-            
-        # Prepare features for prediction
-        features = []
-        
-        # Encode weather condition
-        weather_encoder = self.label_encoders['weather']
-        features.append(weather_encoder.transform([weather])[0])
-        
-        # Add hour of day
-        features.append(hour)
-        
-        # Add preference flags
-        features.append(1 if preferences.get('indoor', False) else 0)
-        features.append(1 if preferences.get('outdoor', False) else 0)
-        features.append(1 if preferences.get('crowded', False) else 0)
-        
-        # Make prediction
-        suitability_score = self.decision_tree.predict([features])[0]
-        return max(0, min(1, suitability_score))  # Ensure score is between 0-1
+
+        num_rows = len(hours)
+        if num_rows == 0:
+            return np.empty(0)
+
+        table, weather_index = self._scoring_state
+        try:
+            weather_idx = np.fromiter((weather_index[w] for w in weathers),
+                                      dtype=np.intp, count=num_rows)
+        except KeyError as e:
+            raise ValueError(f"Unknown weather condition: {e.args[0]}")
+
+        hours = np.asarray(hours)
+        hour_idx = hours.astype(np.intp)
+        in_table = (hour_idx == hours) & (hour_idx >= 0) & (hour_idx < TABLE_HOURS)
+
+        indoor = 1 if preferences.get('indoor', False) else 0
+        outdoor = 1 if preferences.get('outdoor', False) else 0
+        crowded = 1 if preferences.get('crowded', False) else 0
+
+        suitability_scores = np.empty(num_rows)
+        suitability_scores[in_table] = table[
+            weather_idx[in_table], hour_idx[in_table], indoor, outdoor, crowded
+        ]
+
+        if not in_table.all():
+            # Same column layout as train_decision_tree
+            outside = ~in_table
+            features = np.empty((int(outside.sum()), 5))
+            features[:, 0] = weather_idx[outside]
+            features[:, 1] = hours[outside]
+            features[:, 2] = indoor
+            features[:, 3] = outdoor
+            features[:, 4] = crowded
+            suitability_scores[outside] = self._predict_tree(features)
+
+        return suitability_scores
+
+    def _catalog(self, city: str) -> AttractionCatalog:
+        if city.lower() not in self.catalogs:
+            raise ValueError(f"No data available for city: {city}")
+        return self.catalogs[city.lower()]
         
     def get_attractions(self, city: str, filters: Optional[Dict] = None) -> List[Dict]:
-        """Fetch attractions from MongoDB with optional filters"""
-        if city.lower() not in self.city_collections:
-            raise ValueError(f"No data available for city: {city}")
-            
-        collection = self.city_collections[city.lower()]
-        query = {}
+        """Fetch attractions from the city's in-memory catalog with optional filters"""
+        return self._catalog(city).find(filters)
         
-        if filters:
-            if filters.get("avoid_crowd"):
-                query["tags"] = {"$nin": ["crowded"]}
-            if filters.get("indoor_only"):
-                query["indoor_outdoor"] = "indoor"
-            if filters.get("photography_only"):
-                query["tags"] = {"$in": ["photography"]}
+    def update_distance_matrices(self) -> Dict[str, int]:
+        """Offline build step: add new catalog attractions to each city's distance matrix"""
+        added = {}
+        for city, catalog in self.catalogs.items():
+            records = catalog.find_records()
+            added[city] = self.distance_matrices.build(
+                city,
+                [r.id_str for r in records],
+                [np.nan if r.latitude is None else r.latitude for r in records],
+                [np.nan if r.longitude is None else r.longitude for r in records]
+            )
+        return added
         
-        return list(collection.find(query))
+    def watch_catalogs(self):
+        """Start change stream watchers that invalidate each city's catalog"""
+        return [catalog.watch() for catalog in self.catalogs.values()]
 
     def parse_opening_hours(self, opening_hours_str: str) -> Dict[str, str]:
         """Parse opening hours string into open/close times"""
-        if not opening_hours_str:
-            return {"open": "09:00", "close": "18:00"}
-        
-        parts = opening_hours_str.split('–')  # Note: This is an en dash, not hyphen
-        if len(parts) != 2:
-            return {"open": "09:00", "close": "18:00"}
-            
-        return {"open": parts[0].strip(), "close": parts[1].strip()}
+        return parse_opening_hours(opening_hours_str)
 
     def time_to_minutes(self, time_str: str) -> int:
         """Convert HH:MM time string to minutes since midnight"""
-        try:
-            hours, minutes = map(int, time_str.split(':'))
-            return hours * 60 + minutes
-        except:
-            return 540  # Default to 9:00 AM if parsing fails
+        return time_to_minutes(time_str)
 
     def minutes_to_time(self, minutes: int) -> str:
         """Convert minutes since midnight to HH:MM time string"""
@@ -199,18 +764,20 @@ class ItineraryGenerator:
         end_date = datetime.strptime(departure_date, "%Y-%m-%d")
         num_days = (end_date - start_date).days + 1
         
-        # Get attractions from MongoDB
-        all_attractions = self.get_attractions(city, filters)
+        # Get pre-parsed attractions from the city catalog
+        catalog = self._catalog(city)
+        all_attractions, tag_bits = catalog.find_records_with_tags(filters)
+        crowded_bit = tag_bits.get("crowded", 0)
         
         # Filter selected attractions if provided
         if selected_attractions:
-            attractions = [a for a in all_attractions if str(a["_id"]) in selected_attractions]
+            attractions = [a for a in all_attractions if a.id_str in selected_attractions]
         else:
             attractions = all_attractions
             
         # Classify attractions by indoor/outdoor
-        indoor_attractions = [a for a in attractions if a.get("indoor_outdoor", "").lower() == "indoor"]
-        outdoor_attractions = [a for a in attractions if a.get("indoor_outdoor", "").lower() != "indoor"]
+        indoor_attractions = [a for a in attractions if a.indoor]
+        outdoor_attractions = [a for a in attractions if not a.indoor]
         
         # Initialize itinerary structure
         itinerary = {
@@ -237,91 +804,96 @@ class ItineraryGenerator:
             'crowded': not filters.get('avoid_crowd', False) if filters else True
         }
         
-        # Distribute attractions across days
+        # Resolve each day's weather and candidate pool up front
+        day_plans = []
         for day in range(num_days):
             current_date = (start_date + timedelta(days=day)).strftime("%Y-%m-%d")
             day_weather = weather_by_day.get(current_date, "sunny")
             
             # Determine suitable attractions for this day
             if day_weather in ["rainy", "snowy"]:
-                day_attractions = indoor_attractions.copy()
+                day_attractions = indoor_attractions
             else:
-                day_attractions = indoor_attractions + outdoor_attractions.copy()
+                day_attractions = indoor_attractions + outdoor_attractions
+            day_plans.append((current_date, day_weather, day_attractions))
+        
+        # Score every (attraction, day) pair with a single predict call
+        pair_weathers = []
+        pair_hours = []
+        for current_date, day_weather, day_attractions in day_plans:
+            pair_weathers.extend([day_weather] * len(day_attractions))
+            pair_hours.extend(attraction.open_hour for attraction in day_attractions)
+        pair_scores = self.predict_suitability_batch(pair_weathers, pair_hours, preferences).tolist()
+        
+        # Distribute attractions across days
+        scheduled_ids = set()
+        is_indian = nationality.lower() == "indian"
+        offset = 0
+        for current_date, day_weather, day_attractions in day_plans:
+            day_scores = pair_scores[offset:offset + len(day_attractions)]
+            offset += len(day_attractions)
                 
-            # Score attractions based on decision tree predictions
-            scored_attractions = []
-            for attraction in day_attractions:
+            # Queue candidates by suitability score (highest first); the
+            # position breaks ties so equal scores keep catalog order
+            candidates = []
+            for position, (attraction, suitability_score) in enumerate(zip(day_attractions, day_scores)):
                 # Skip if we've already scheduled this attraction
-                if any(a["_id"] == attraction["_id"] for day in itinerary["days"] for a in day["attractions"]):
+                if attraction.id in scheduled_ids:
                     continue
-                    
-                # Calculate suitability score
-                opening_hours = self.parse_opening_hours(attraction.get("opening_hours", {}).get("daily", ""))
-                open_time = self.time_to_minutes(opening_hours["open"])
-                hour_of_day = open_time // 60  # Convert minutes to hour
-                
-                suitability_score = self.predict_attraction_suitability(
-                    day_weather, hour_of_day, preferences
-                )
                 
                 # Adjust score based on crowd preference
-                if "crowded" in attraction.get("tags", []) and not preferences.get('crowded', True):
+                if attraction.tag_bits & crowded_bit and not preferences.get('crowded', True):
                     suitability_score *= 0.5
                 
-                scored_attractions.append((attraction, suitability_score))
-            
-            # Sort by suitability score (highest first)
-            scored_attractions.sort(key=lambda x: x[1], reverse=True)
-            day_attractions = [attraction for attraction, score in scored_attractions]
+                candidates.append((-suitability_score, position, attraction))
+            heapq.heapify(candidates)
             
             # Schedule attractions for this day
             day_schedule = []
-            current_time = self.time_to_minutes("09:00")  # Start at 9 AM
+            current_time = DAY_START  # Start at 9 AM
             
-            for attraction in day_attractions:
-                # Get attraction details
-                opening_hours = self.parse_opening_hours(attraction.get("opening_hours", {}).get("daily", ""))
-                open_time = self.time_to_minutes(opening_hours["open"])
-                close_time = self.time_to_minutes(opening_hours["close"])
-                duration = attraction.get("avg_visit_duration", 60)
+            while candidates:
+                neg_score, _, attraction = heapq.heappop(candidates)
+                duration = attraction.duration
                 
                 # Adjust start time if needed
-                if current_time < open_time:
-                    current_time = open_time
+                if current_time < attraction.open_time:
+                    current_time = attraction.open_time
                     
                 # Check if we have enough time before closing
-                if current_time + duration > close_time:
+                if current_time + duration > attraction.close_time:
                     continue
                     
                 # Calculate entry fee
-                entry_fee = attraction.get("entry_fee", {})
-                fee = entry_fee.get("indian", 0) if nationality.lower() == "indian" else entry_fee.get("foreigner", 0)
+                fee = attraction.fee_indian if is_indian else attraction.fee_foreigner
                 total_fee = fee * num_persons
                 
                 # Add to day's schedule
+                doc = attraction.doc
                 day_schedule.append({
-                    "attraction_id": str(attraction["_id"]),
-                    "name": attraction["name"],
-                    "category": attraction.get("category", ""),
+                    "attraction_id": attraction.id_str,
+                    "name": doc["name"],
+                    "category": doc.get("category", ""),
                     "start_time": self.minutes_to_time(current_time),
                     "end_time": self.minutes_to_time(current_time + duration),
                     "duration": duration,
                     "location": {
-                        "address": attraction.get("address", ""),
-                        "latitude": attraction.get("latitude"),
-                        "longitude": attraction.get("longitude")
+                        "address": doc.get("address", ""),
+                        "latitude": attraction.latitude,
+                        "longitude": attraction.longitude
                     },
                     "entry_fee": total_fee,
-                    "image": attraction.get("images", ""),
-                    "description": attraction.get("description", ""),
-                    "suitability_score": next(score for att, score in scored_attractions if att["_id"] == attraction["_id"])
+                    "image": doc.get("images", ""),
+                    "description": doc.get("description", ""),
+                    "suitability_score": -neg_score
                 })
+                scheduled_ids.add(attraction.id)
                 
                 # Add travel time between attractions (30 mins default)
                 current_time += duration + 30
                 
                 # Stop if we've reached evening (6 PM)
-                if current_time >= self.time_to_minutes("18:00"):
+                if current_time >= DAY_END:
                     break
                     
             # Add day to itinerary
@@ -340,35 +912,132 @@ class ItineraryGenerator:
         
         return itinerary
 
-    def optimize_itinerary(self, itinerary: Dict) -> Dict:
-        """Optimize an existing itinerary by reordering attractions"""
-        for day in itinerary["days"]:
-            # Sort attractions by location to minimize travel time
-            day["attractions"].sort(key=lambda x: (x["location"]["latitude"], x["location"]["longitude"]))
+    def generate_itineraries(self, requests: List[Dict], processes: Optional[int] = None,
+                             optimize: bool = False, chunksize: int = 4,
+                             save_collection: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Generate many itineraries in a process pool, yielding them as they finish
+        
+        Each request holds generate_itinerary keyword arguments. Results are
+        {"index", "itinerary", "error"} dicts in completion order, where index
+        is the request's position in the input list.
+        
+        The catalogs and model are loaded once here and inherited by the
+        forked workers copy-on-write, so no worker queries MongoDB or trains.
+        Platforms without fork run the batch in this process.
+        
+        With save_collection, every itinerary is also queued on that
+        collection's write-behind writer and gets an "itinerary_id".
+        """
+        # Warm everything the workers need before forking
+        for city in {request["city"].lower() for request in requests}:
+            if city in self.catalogs:
+                self.catalogs[city].find_records()
+        if not self.is_trained:
+            self.train_decision_tree(None)
             
-            # Recalculate times after sorting
-            current_time = self.time_to_minutes("09:00")
-            for attraction in day["attractions"]:
-                opening_hours = self.parse_opening_hours(attraction.get("opening_hours", {}).get("daily", ""))
-                open_time = self.time_to_minutes(opening_hours["open"])
-                
-                if current_time < open_time:
-                    current_time = open_time
+        items = [(i, request, optimize) for i, request in enumerate(requests)]
+        try:
+            context = multiprocessing.get_context("fork")
+            pool = context.Pool(processes, initializer=_init_batch_worker, initargs=(self,))
+            results = pool.imap_unordered(_generate_batch_item, items, chunksize)
+        except ValueError:
+            pool = None
+            results = (_generate_batch_item(item, self) for item in items)
+            
+        # Started only after the fork, so the workers never inherit its thread
+        writer = self.get_itinerary_writer(save_collection) if save_collection else None
+        
+        try:
+            for result in results:
+                if writer and result["itinerary"] is not None:
+                    result["itinerary_id"] = writer.submit(result["itinerary"])
+                yield result
+        finally:
+            if pool:
+                pool.terminate()
+            
+    def optimize_itinerary(self, itinerary: Dict, time_budget: float = 0.05) -> Dict:
+        """
+        Optimize an existing itinerary by reordering each day's attractions
+        
+        Each day is routed over a haversine travel-time matrix, keeping every
+        visit inside its opening window where possible. time_budget (seconds)
+        bounds the whole call and is shared evenly across the remaining days.
+        """
+        catalog = self.catalogs.get(itinerary["city"].lower())
+        deadline = time.monotonic() + time_budget
+        days = itinerary["days"]
+        
+        for i, day in enumerate(days):
+            stops = day["attractions"]
+            
+            # Opening hours come from the pre-parsed catalog record
+            open_times, close_times = [], []
+            for attraction in stops:
+                record = catalog.get_record(attraction["attraction_id"]) if catalog else None
+                if record:
+                    open_times.append(record.open_time)
+                    close_times.append(record.close_time)
+                else:
+                    opening_hours = self.parse_opening_hours(attraction.get("opening_hours", {}).get("daily", ""))
+                    open_times.append(self.time_to_minutes(opening_hours["open"]))
+                    close_times.append(self.time_to_minutes(opening_hours["close"]))
                     
-                attraction["start_time"] = self.minutes_to_time(current_time)
-                current_time += attraction["duration"]
-                attraction["end_time"] = self.minutes_to_time(current_time)
-                
-                # Add travel time between attractions
-                current_time += 30
+            # Prefer the precomputed city matrix; compute on the fly otherwise
+            matrices = None
+            city_matrix = self.distance_matrices.load(itinerary["city"].lower()) if self.distance_matrices else None
+            if city_matrix:
+                matrices = city_matrix.submatrices([a["attraction_id"] for a in stops])
+            if matrices:
+                distances, travel_minutes = matrices
+            else:
+                distances = haversine_matrix(
+                    [a["location"]["latitude"] for a in stops],
+                    [a["location"]["longitude"] for a in stops]
+                )
+                travel_minutes = travel_minutes_matrix(distances)
+            
+            optimizer = DayRouteOptimizer(
+                distances, travel_minutes, open_times, close_times,
+                [a["duration"] for a in stops], start_time=DAY_START
+            )
+            
+            now = time.monotonic()
+            day_deadline = now + max(0.0, deadline - now) / (len(days) - i)
+            order = optimizer.optimize(deadline=day_deadline)
+            
+            # Recalculate times along the new route, including travel
+            for stop, (start, end) in zip(order, optimizer.schedule(order)):
+                stops[stop]["start_time"] = self.minutes_to_time(start)
+                stops[stop]["end_time"] = self.minutes_to_time(end)
+            day["attractions"] = [stops[stop] for stop in order]
                 
         return itinerary
 
-    def save_itinerary_to_db(self, itinerary: Dict, collection_name: str = "itineraries"):
-        """Save generated itinerary to MongoDB"""
-        collection = self.db[collection_name]
-        result = collection.insert_one(itinerary)
-        return result.inserted_id
+    def get_itinerary_writer(self, collection_name: str = "itineraries") -> ItineraryWriter:
+        with self._writers_lock:
+            if collection_name not in self.itinerary_writers:
+                self.itinerary_writers[collection_name] = ItineraryWriter(self.db[collection_name])
+            return self.itinerary_writers[collection_name]
+            
+    def save_itinerary_to_db(self, itinerary: Dict, collection_name: str = "itineraries",
+                             wait: bool = False):
+        """
+        Save generated itinerary to MongoDB through the write-behind writer
+        
+        Returns the itinerary's _id straight away; pass wait=True to block
+        until the write has been flushed. With wait=True a failed write
+        raises pymongo.errors.WriteError, as insert_one did.
+        """
+        writer = self.get_itinerary_writer(collection_name)
+        itinerary_id = writer.submit(itinerary)
+        if wait:
+            writer.flush()
+            error = writer.error_for(itinerary_id)
+            if error is not None:
+                raise WriteError(error["message"], error["code"], error)
+        return itinerary_id
 
 # Example usage
 if __name__ == "__main__":